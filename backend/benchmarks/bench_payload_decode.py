@@ -0,0 +1,85 @@
+"""
+Telemetry ingest payload benchmark: JSON (Pydantic) vs JSON (orjson fast path)
+vs MessagePack vs CBOR. Reports body size and per-reading decode cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_payload_decode [--keys 12] [--iterations 20000]
+"""
+import argparse
+import json
+import random
+import timeit
+
+import cbor2
+import msgpack
+import orjson
+
+from core.payloads import decode_body, extract_data
+from modules.end_device.schemas.telemetry import TelemetryCreate
+
+
+def sample_reading(keys: int, seed: int = 42) -> dict:
+    """A representative device reading: numeric sensors plus a few flags/strings"""
+    rng = random.Random(seed)
+    data = {
+        "temperature": round(rng.uniform(18, 40), 2),
+        "humidity": round(rng.uniform(20, 90), 2),
+        "voltage": round(rng.uniform(3.0, 4.2), 3),
+        "rssi": rng.randint(-110, -40),
+        "status": rng.choice(["ok", "warn", "alarm"]),
+        "door_open": rng.random() < 0.1,
+    }
+    for i in range(max(0, keys - len(data))):
+        data[f"sensor_{i}"] = round(rng.uniform(0, 1000), 3)
+    return {"data": data}
+
+
+def run(keys: int, iterations: int) -> list:
+    reading = sample_reading(keys)
+    bodies = {
+        "json (pydantic)": (json.dumps(reading).encode(), None),
+        "json (orjson)": (orjson.dumps(reading), "application/json"),
+        "msgpack": (msgpack.packb(reading), "application/msgpack"),
+        "cbor": (cbor2.dumps(reading), "application/cbor"),
+    }
+
+    results = []
+    for name, (body, content_type) in bodies.items():
+        if content_type is None:
+            fn = lambda: TelemetryCreate.model_validate_json(body).data
+        else:
+            fn = lambda: extract_data(decode_body(body, content_type))
+        seconds = min(timeit.repeat(fn, number=iterations, repeat=3))
+        results.append({
+            "format": name,
+            "bytes": len(body),
+            "us_per_reading": round(seconds / iterations * 1e6, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=12, help="Keys per reading")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.keys, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results[0]
+    print(f"{'format':<18}{'bytes':>8}{'size %':>9}{'us/reading':>13}{'speedup':>10}")
+    for row in results:
+        print(
+            f"{row['format']:<18}{row['bytes']:>8}"
+            f"{row['bytes'] / baseline['bytes'] * 100:>8.0f}%"
+            f"{row['us_per_reading']:>13.2f}"
+            f"{baseline['us_per_reading'] / row['us_per_reading']:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+HTTP load test: drives the API with configurable concurrency and reports
+throughput, latency percentiles and error rate per scenario as JSON, with
+optional regression comparison against a stored baseline.
+
+Scenarios:
+    ingest_storm     POST telemetry for random seeded end devices and gateways
+    dashboard_reads  telemetry pages, metric aggregates, gateway list, health
+    list_10k         client / order / end device lists at limit=10000
+    login_burst      POST /auth/login with the benchmark user
+
+Database setup (from backend/):
+    Local Postgres: point DATABASE_URL_USERS, _ORDERS, _CLIENTS,
+    _USERS_IMPLEMENTATION, _END_DEVICE and _GATEWAY at six local databases
+    (or run docker-compose), then seed:
+        python -m benchmarks.seed --scale medium
+
+    SQLite stand-in: set every DATABASE_URL_* to a file URL, e.g.
+        DATABASE_URL_END_DEVICE=sqlite:////tmp/bench/end_device.db
+    Fine for list, login and read-path comparisons; JSONB containment
+    filters, GIN indexes and write concurrency are Postgres-only, so
+    ingest_storm numbers on SQLite are not representative.
+
+Usage:
+    python -m benchmarks.loadtest --boot --scenario all --concurrency 32 --duration 30 \\
+        --output report.json --baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --base-url http://localhost:1679 --scenario ingest_storm --save-baseline
+
+Exits non-zero when --baseline is given and any scenario regressed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.seed import DEFAULT_MANIFEST
+from core.config import settings
+from scripts.generate_data import device_reading
+
+API = settings.API_V1_STR
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# (label, method, path, request kwargs)
+RequestSpec = Tuple[str, str, str, Dict[str, Any]]
+
+
+def ingest_storm(rng: random.Random, manifest: dict) -> RequestSpec:
+    headers = {"X-IOT-Token": settings.IOT_DEVICE_ACCESS_TOKEN}
+    if manifest["gateways"] and rng.random() < 0.2:
+        gateway_id = rng.choice(manifest["gateways"])
+        return ("gateway telemetry", "POST", f"{API}/gateway/{gateway_id}/telemetry",
+                {"json": {"data": device_reading(rng)}, "headers": headers})
+    device_id = rng.choice(manifest["end_devices"])
+    return ("end_device telemetry", "POST", f"{API}/end_device/{device_id}/telemetry",
+            {"json": {"data": device_reading(rng)}, "headers": headers})
+
+
+def dashboard_reads(rng: random.Random, manifest: dict) -> RequestSpec:
+    device_id = rng.choice(manifest["end_devices"])
+    choice = rng.random()
+    if choice < 0.4:
+        return ("telemetry page", "GET", f"{API}/end_device/{device_id}/telemetry", {"params": {"limit": 50}})
+    if choice < 0.7:
+        return ("metric summary", "GET", f"{API}/end_device/{device_id}/telemetry/metrics/temperature", {})
+    if choice < 0.9:
+        return ("gateway list", "GET", f"{API}/gateway/", {"params": {"limit": 100}})
+    return ("health", "GET", f"{API}/health", {})
+
+
+def list_10k(rng: random.Random, manifest: dict) -> RequestSpec:
+    resource = rng.choice(["clients", "orders", "end_device"])
+    return (f"{resource} list", "GET", f"{API}/{resource}/", {"params": {"limit": 10000}})
+
+
+def login_burst(rng: random.Random, manifest: dict) -> RequestSpec:
+    return ("login", "POST", f"{API}/auth/login", {"json": manifest["user"]})
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, dict], RequestSpec]] = {
+    "ingest_storm": ingest_storm,
+    "dashboard_reads": dashboard_reads,
+    "list_10k": list_10k,
+    "login_burst": login_burst,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[Tuple[str, float, bool]], elapsed: float) -> dict:
+    latencies = sorted(ms for _, ms, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    by_request: Dict[str, List[float]] = {}
+    for label, ms, _ in samples:
+        by_request.setdefault(label, []).append(ms)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "by_request_p95_ms": {
+            label: round(percentile(sorted(values), 95), 2) for label, values in sorted(by_request.items())
+        },
+    }
+
+
+async def run_scenario(base_url: str, name: str, manifest: dict, concurrency: int,
+                       duration: float, max_requests: Optional[int], seed: int) -> dict:
+    make_request = SCENARIOS[name]
+    samples: List[Tuple[str, float, bool]] = []
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(worker_id: int, client: httpx.AsyncClient):
+        nonlocal issued
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            label, method, path, kwargs = make_request(rng, manifest)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples.append((label, (time.perf_counter() - started) * 1000, ok))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(samples, elapsed)
+    result["concurrency"] = concurrency
+    return result
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions: p95/p99 up or throughput down by more than `tolerance`, or error rate up"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for pct in ("p95", "p99"):
+            before, after = previous["latency_ms"][pct], current["latency_ms"][pct]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{name}: {pct} {before} ms -> {after} ms")
+        before, after = previous["throughput_rps"], current["throughput_rps"]
+        if before and after < before * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before} -> {after} req/s")
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {previous['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def boot_server(port: int, workers: int) -> subprocess.Popen:
+    """Start the app with uvicorn under the current environment and wait until /ready answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    url = f"http://127.0.0.1:{port}{API}/ready"
+    for _ in range(120):
+        if process.poll() is not None:
+            raise SystemExit("Server exited during startup")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Server did not become ready")
+
+
+def print_table(report: dict):
+    print(f"{'scenario':<18}{'req':>8}{'err %':>8}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}", file=sys.stderr)
+    for name, r in report["scenarios"].items():
+        lat = r["latency_ms"]
+        print(
+            f"{name:<18}{r['requests']:>8}{r['error_rate'] * 100:>7.1f}%{r['throughput_rps']:>10.1f}"
+            f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:1679")
+    parser.add_argument("--boot", action="store_true", help="Start the app locally (uvicorn) for the run")
+    parser.add_argument("--port", type=int, default=18080, help="Port for --boot")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --boot")
+    parser.add_argument("--scenario", default="all", help=f"all or comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=None, help="Stop a scenario after this many requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Written by benchmarks.seed")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Compare against this report; exit 1 on regression")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown vs baseline")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else args.scenario.split(",")
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    server = None
+    base_url = args.base_url
+    if args.boot:
+        server = boot_server(args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        report = {
+            "meta": {
+                "base_url": base_url, "seed": args.seed, "duration": args.duration,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "end_devices": len(manifest["end_devices"]), "gateways": len(manifest["gateways"]),
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            report["scenarios"][name] = asyncio.run(run_scenario(
+                base_url, name, manifest, args.concurrency, args.duration, args.requests, args.seed
+            ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    print_table(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(payload)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
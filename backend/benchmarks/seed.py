@@ -0,0 +1,60 @@
+"""
+Benchmark fixtures: fills whatever databases DATABASE_URL_* point at using
+scripts.generate_data, then writes a manifest (IDs and a login user) that
+benchmarks.loadtest reads. Deterministic for a given --seed.
+
+Usage (from backend/):
+    python -m benchmarks.seed --scale medium --workers 8
+    python -m benchmarks.seed --scale small --end-devices 200 --days 2
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+
+from scripts.generate_data import (
+    GENERATED_PASSWORD,
+    PROFILES,
+    _gateway_plan,
+    client_names,
+    end_device_ids,
+    generate,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST = "benchmarks/manifest.json"
+
+
+def build_manifest(config: dict, seed: int) -> dict:
+    return {
+        "seed": seed,
+        "end_devices": end_device_ids(config["end_devices"]),
+        "gateways": [g["gateway_ID"] for g in _gateway_plan(config, seed)],
+        "clients": client_names(config["clients"]),
+        "user": {"username": "user0001", "password": GENERATED_PASSWORD},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(PROFILES), default="medium")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    for key in PROFILES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help="Override the scale profile")
+    args = parser.parse_args()
+
+    config = dict(PROFILES[args.scale])
+    config.update({key: getattr(args, key) for key in config if getattr(args, key) is not None})
+
+    logging.basicConfig(level=logging.INFO)
+    generate(config, args.seed, args.workers)
+    with open(args.manifest, "w") as f:
+        json.dump(build_manifest(config, args.seed), f)
+    logger.info(f"Manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
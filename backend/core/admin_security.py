@@ -0,0 +1,30 @@
+from fastapi import Security, HTTPException, status
+from fastapi.security import APIKeyHeader
+from core.config import settings
+
+admin_key_header = APIKeyHeader(name="X-Admin-Token", auto_error=False)
+
+async def verify_admin_token(api_key: str = Security(admin_key_header)):
+    """
+    Verifies the operator token from the 'X-Admin-Token' header.
+    Use this dependency to protect diagnostic endpoints (profiling etc.).
+    Admin endpoints are disabled unless ADMIN_ACCESS_TOKEN is configured.
+    """
+    if not settings.ADMIN_ACCESS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled (ADMIN_ACCESS_TOKEN not set)"
+        )
+
+    if not api_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing Authentication Token (X-Admin-Token header)"
+        )
+
+    if api_key != settings.ADMIN_ACCESS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid Authentication Token"
+        )
+    return api_key
@@ -0,0 +1,156 @@
+"""
+Admission Control
+Caps concurrent requests per route class and in total, per worker. A request
+that cannot get a slot within its class's queue deadline (or finds the queue
+full) is rejected at once with 503 + Retry-After instead of piling up in the
+threadpool behind a slow database. When the total limit is the bottleneck,
+waiting requests are admitted by class priority: ingest first, bulk last.
+
+Route classes:
+    ingest  POST .../telemetry (device and gateway readings)
+    upload  POST .../telemetry/upload (streamed NDJSON backlogs)
+    auth    /auth, /auth_implementation
+    admin   /admin/*
+    bulk    /bulk and /lookup batches, list reads with limit > BULK_LIST_LIMIT
+    read    other GETs
+    write   other POST / PUT / PATCH / DELETE
+Health, readiness, metrics and live telemetry streams are never queued.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import settings
+from .metrics import ADMISSION_QUEUE_WAIT, ADMISSION_REJECTED
+
+PRIORITIES = {"ingest": 0, "auth": 1, "admin": 1, "write": 2, "read": 2, "bulk": 3, "upload": 3}
+BULK_LIST_LIMIT = 1000
+EXEMPT_SUFFIXES = ("/health", "/health/pools", "/ready", "/metrics", "/stream")
+
+
+def route_class(scope: Scope) -> Optional[str]:
+    """Class for a request, or None when it bypasses admission control"""
+    path = scope["path"]
+    method = scope["method"]
+    if path.endswith(EXEMPT_SUFFIXES) or method in ("OPTIONS", "HEAD"):
+        return None
+    relative = path[len(settings.API_V1_STR):] if path.startswith(settings.API_V1_STR) else path
+    if method == "POST" and relative.endswith("/telemetry/upload"):
+        return "upload"
+    if method == "POST" and "/telemetry" in relative:
+        return "ingest"
+    if relative.startswith(("/auth/", "/auth_implementation/")):
+        return "auth"
+    if relative.startswith("/admin/"):
+        return "admin"
+    if relative.endswith(("/bulk", "/lookup")):
+        return "bulk"
+    if method == "GET":
+        limit = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("limit", ["0"])[-1]
+        if limit.isdigit() and int(limit) > BULK_LIST_LIMIT:
+            return "bulk"
+        return "read"
+    return "write"
+
+
+class PriorityLimiter:
+    """
+    Asyncio concurrency limit whose waiters are served lowest priority value
+    first (FIFO within a priority). A released slot is handed straight to the
+    next waiter, so late arrivals cannot jump the queue.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self._waiters: List[list] = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return True
+        if timeout <= 0:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._order), future])
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # The slot was handed over just as we gave up: keep it or pass it on
+                if isinstance(e, asyncio.TimeoutError):
+                    return True
+                self.release()
+            else:
+                future.cancel()
+                self.waiting -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.waiting -= 1
+                future.set_result(True)  # Slot passes to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    """Per-class and global concurrency limits with queue deadlines and fast 503 shedding"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.total = PriorityLimiter(settings.ADMISSION_MAX_CONCURRENCY)
+        self.classes = {name: PriorityLimiter(limit) for name, limit in settings.ADMISSION_LIMITS.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        name = route_class(scope) if scope["type"] == "http" else None
+        limiter = self.classes.get(name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        deadline = started + settings.ADMISSION_QUEUE_MS.get(name, 1000) / 1000
+        priority = PRIORITIES.get(name, 2)
+
+        if limiter.waiting >= settings.ADMISSION_MAX_QUEUE:
+            await self._reject(scope, receive, send, name, "queue_full")
+            return
+        if not await limiter.acquire(priority, deadline - time.monotonic()):
+            await self._reject(scope, receive, send, name, "deadline")
+            return
+        try:
+            if not await self.total.acquire(priority, deadline - time.monotonic()):
+                await self._reject(scope, receive, send, name, "deadline")
+                return
+            ADMISSION_QUEUE_WAIT.labels(name).observe(time.monotonic() - started)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.total.release()
+        finally:
+            limiter.release()
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, name: str, reason: str):
+        ADMISSION_REJECTED.labels(name, reason).inc()
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": "Service is overloaded, please retry shortly", "route_class": name},
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+        await response(scope, receive, send)
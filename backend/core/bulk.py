@@ -0,0 +1,184 @@
+"""
+Bulk Operations
+Shared helpers for the `/bulk` create/update/delete endpoints: one-step
+allocation of PREFIX-YYYY-NNNN identifiers, executemany inserts with
+RETURNING, and per-item result schemas. Also batch lookup of mixed
+internal/public identifiers in a single IN query.
+"""
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+T = TypeVar("T")
+
+
+class BulkItemResult(BaseModel, Generic[T]):
+    index: int  # Position in the request body
+    id: Optional[int] = None
+    status: str  # created | updated | deleted | not_found
+    item: Optional[T] = None
+
+
+class BulkResult(BaseModel, Generic[T]):
+    requested: int
+    succeeded: int
+    results: List[BulkItemResult[T]]
+
+
+class BulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class BulkLookup(BaseModel):
+    ids: List[str] = Field(..., min_length=1)  # Internal IDs and/or public IDs, mixed
+
+
+class LookupResult(BaseModel, Generic[T]):
+    items: List[T]  # In request order, duplicates removed
+    missing: List[str]
+
+
+def check_batch_size(count: int):
+    if count == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty bulk request")
+    if count > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+
+
+def yearly_prefix(code: str) -> str:
+    return f"{code}-{datetime.now().year}-"
+
+
+def allocate_ids(db: Session, column, prefix: str, count: int) -> List[str]:
+    """
+    Reserve `count` consecutive PREFIX-NNNN identifiers with a single lookup.
+    On PostgreSQL a transaction-scoped advisory lock on the prefix keeps
+    concurrent allocations from handing out the same numbers; it is released
+    when the caller commits or rolls back.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:prefix))"), {"prefix": prefix})
+
+    # Longest then greatest: numeric order for zero-padded IDs past 9999
+    last = db.execute(
+        select(column).where(column.like(f"{prefix}%"))
+        .order_by(func.length(column).desc(), column.desc()).limit(1)
+    ).scalar()
+    try:
+        start = int(last.split("-")[-1]) + 1 if last else 1
+    except ValueError:
+        start = 1
+    return [f"{prefix}{number:04d}" for number in range(start, start + count)]
+
+
+def bulk_insert(db: Session, model, rows: List[Dict[str, Any]]) -> list:
+    """executemany INSERT ... RETURNING; objects come back in input order"""
+    return list(db.scalars(insert(model).returning(model, sort_by_parameter_order=True), rows))
+
+
+def bulk_update(db: Session, model, changes: List[Dict[str, Any]]) -> Tuple[Dict[int, Any], set]:
+    """
+    Apply per-row changes ({"id": ..., field: value}) by primary key.
+    Returns ({id: refreshed object}, missing ids).
+    """
+    ids = {change["id"] for change in changes}
+    existing = set(db.scalars(select(model.id).where(model.id.in_(ids))))
+    rows = [change for change in changes if change["id"] in existing and len(change) > 1]
+    if rows:
+        db.execute(update(model), rows)
+    refreshed = {
+        obj.id: obj for obj in db.scalars(
+            select(model).where(model.id.in_(existing)).execution_options(populate_existing=True)
+        )
+    }
+    return refreshed, ids - existing
+
+
+def bulk_delete(db: Session, model, ids: List[int]) -> set:
+    """Delete rows by primary key in one statement; returns the ids that existed"""
+    existing = set(db.scalars(select(model.id).where(model.id.in_(ids))))
+    if existing:
+        db.execute(delete(model).where(model.id.in_(existing)))
+    return existing
+
+
+def created_result(objects: list) -> dict:
+    return {
+        "requested": len(objects),
+        "succeeded": len(objects),
+        "results": [
+            {"index": i, "id": obj.id, "status": "created", "item": obj} for i, obj in enumerate(objects)
+        ],
+    }
+
+
+def updated_result(changes: List[Dict[str, Any]], refreshed: Dict[int, Any]) -> dict:
+    results = [
+        {"index": i, "id": change["id"], "status": "updated", "item": refreshed[change["id"]]}
+        if change["id"] in refreshed else {"index": i, "id": change["id"], "status": "not_found"}
+        for i, change in enumerate(changes)
+    ]
+    return {
+        "requested": len(changes),
+        "succeeded": sum(1 for r in results if r["status"] == "updated"),
+        "results": results,
+    }
+
+
+def deleted_result(ids: List[int], deleted: set) -> dict:
+    return {
+        "requested": len(ids),
+        "succeeded": len(deleted),
+        "results": [
+            {"index": i, "id": id, "status": "deleted" if id in deleted else "not_found"}
+            for i, id in enumerate(ids)
+        ],
+    }
+
+
+def parse_ids(ids: Optional[str]) -> List[str]:
+    """Split an `ids=1,ED-2025-0002,...` query value"""
+    return [part.strip() for part in (ids or "").split(",") if part.strip()]
+
+
+def lookup_one(db: Session, model, public_column, identifier: str):
+    """Internal (numeric) or public ID in one query; the internal ID wins if both match"""
+    if not identifier.isdigit():
+        return db.scalars(select(model).where(public_column == identifier)).first()
+    rows = db.scalars(select(model).where(or_(model.id == int(identifier), public_column == identifier))).all()
+    return next((obj for obj in rows if obj.id == int(identifier)), rows[0] if rows else None)
+
+
+def lookup_many(db: Session, model, public_column, identifiers: List[str]) -> Tuple[list, List[str]]:
+    """
+    Resolve mixed internal/public identifiers with one `id IN (...) OR public IN (...)`
+    query. Numeric identifiers match the internal ID first, as the single GET does.
+    Returns (objects in request order without duplicates, identifiers not found).
+    """
+    check_batch_size(len(identifiers))
+    numeric = {int(i) for i in identifiers if i.isdigit()}
+    clause = public_column.in_(set(identifiers))
+    if numeric:
+        clause = or_(model.id.in_(numeric), clause)
+    rows = db.scalars(select(model).where(clause)).all()
+
+    by_id = {obj.id: obj for obj in rows}
+    by_public = {getattr(obj, public_column.key): obj for obj in rows}
+    found, missing, seen = [], [], set()
+    for identifier in identifiers:
+        obj = (by_id.get(int(identifier)) if identifier.isdigit() else None) or by_public.get(identifier)
+        if obj is None:
+            missing.append(identifier)
+        elif obj.id not in seen:
+            seen.add(obj.id)
+            found.append(obj)
+    return found, missing
@@ -0,0 +1,132 @@
+"""
+Response Compression
+ASGI middleware negotiating zstd / br / gzip from Accept-Encoding. Only
+complete (non-streaming) responses with an allowlisted content type and at
+least COMPRESSION_MIN_SIZE bytes are compressed, so small replies, SSE and
+NDJSON streams pass through untouched. Responses for `cached_paths` (the
+OpenAPI document) are compressed once per encoding and served from memory.
+"""
+import gzip
+import logging
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import anyio
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: "br" is skipped when the package is missing
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    levels = settings.COMPRESSION_LEVELS
+    available = {
+        "gzip": lambda body: gzip.compress(body, compresslevel=levels.get("gzip", 6), mtime=0),
+        "zstd": lambda body: zstandard.ZstdCompressor(level=levels.get("zstd", 3)).compress(body),
+    }
+    if brotli is not None:
+        available["br"] = lambda body: brotli.compress(body, quality=levels.get("br", 4))
+    elif "br" in settings.COMPRESSION_ENCODINGS:
+        logger.warning("COMPRESSION_ENCODINGS lists br but the brotli package is not installed; skipping it")
+    return {name: available[name] for name in settings.COMPRESSION_ENCODINGS if name in available}
+
+
+def negotiate(accept_encoding: str, supported: Iterable[str]) -> Optional[str]:
+    """Best supported encoding by client q-value, then by server preference order"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    ranked = [(weights.get(name, wildcard), -order, name) for order, name in enumerate(supported)]
+    ranked = [entry for entry in ranked if entry[0] > 0]
+    return max(ranked)[2] if ranked else None
+
+
+class CompressionMiddleware:
+    """Compress complete textual responses; cache compressed bodies for immutable paths"""
+
+    def __init__(self, app: ASGIApp, cached_paths: Iterable[str] = ()):
+        self.app = app
+        self.cached_paths = set(cached_paths)
+        self.compressors = _compressors()
+        self._cache: Dict[Tuple[str, Optional[str]], Tuple[Message, bytes]] = {}
+
+    def _compressible(self, headers: MutableHeaders, body: bytes) -> bool:
+        if "content-encoding" in headers or len(body) < settings.COMPRESSION_MIN_SIZE:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "text/event-stream":
+            return False
+        return any(content_type.startswith(allowed) for allowed in settings.COMPRESSION_CONTENT_TYPES)
+
+    async def _compress(self, encoding: str, body: bytes) -> bytes:
+        compress = self.compressors[encoding]
+        if len(body) > OFFLOAD_BYTES:
+            return await anyio.to_thread.run_sync(compress, body)
+        return compress(body)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.compressors)
+        cache_key = (scope["path"], encoding) if scope["path"] in self.cached_paths else None
+        if cache_key in self._cache:
+            start, body = self._cache[cache_key]
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+        if encoding is None and cache_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message  # Held until the first body chunk decides the encoding
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Streaming response (SSE, NDJSON export): forward as-is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            if encoding is not None and self._compressible(headers, body):
+                body = await self._compress(encoding, body)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            if cache_key is not None and start["status"] == 200:
+                self._cache[cache_key] = (dict(start, headers=list(start["headers"])), body)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
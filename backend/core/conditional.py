@@ -0,0 +1,95 @@
+"""
+Conditional GET
+ETag / Last-Modified validators for list and detail endpoints. A list's
+version is (row count, max id, max(updated_at, created_at)) read in one
+aggregate query, so an unchanged poll costs that query plus a 304 instead
+of loading and serializing the rows. Deletes change the count, inserts the
+max id and updates the timestamp.
+
+The timestamp comes from now() on PostgreSQL, which is the transaction
+start time: an update in a long transaction that commits after a newer one
+can carry an older updated_at than the current maximum, leaving the ETag
+unchanged until the next insert, delete or later update. Pages that must
+see every edit immediately should not rely on the list ETag alone.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def _not_modified_since(header: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _evaluate(request: Request, response: Response, etag: str, last_modified: Optional[datetime],
+              max_age: int, use_modified_since: bool) -> Optional[Response]:
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}" if max_age else "private, no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    elif use_modified_since and "if-modified-since" in request.headers:
+        matched = _not_modified_since(request.headers["if-modified-since"], last_modified)
+    else:
+        matched = False
+    return Response(status_code=304, headers=headers) if matched else None
+
+
+def conditional_list(request: Request, response: Response, db: Session, model,
+                     max_age: int = 0) -> Optional[Response]:
+    """
+    Validators for a list endpoint; returns a 304 response when the client's
+    copy is current. The ETag covers the query string, so each filter/page/
+    fieldset combination is validated separately. Only If-None-Match is
+    honoured: a delete does not advance Last-Modified.
+    """
+    count, last_id, changed = db.execute(
+        select(func.count(model.id), func.max(model.id), func.max(func.coalesce(model.updated_at, model.created_at)))
+    ).one()
+    etag = _etag(model.__tablename__, count, last_id, changed, request.url.query)
+    if isinstance(changed, str):  # SQLite returns the aggregate unparsed
+        changed = datetime.fromisoformat(changed)
+    return _evaluate(request, response, etag, changed, max_age, use_modified_since=False)
+
+
+def conditional_item(request: Request, response: Response, obj, max_age: int = 0) -> Optional[Response]:
+    """Validators for a single row, from its id and last change time"""
+    changed = obj.updated_at or obj.created_at
+    etag = _etag(obj.__tablename__, obj.id, changed)
+    return _evaluate(request, response, etag, changed, max_age, use_modified_since=True)
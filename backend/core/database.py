@@ -1,13 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
 from .config import settings
+from .metrics import TimedQueuePool, instrument_engine
+from .db_diagnostics import attach_diagnostics
+from .deadlines import attach_deadlines
 from enum import Enum
 import time
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -32,18 +34,30 @@ POOL_SETTINGS = {
     "pool_timeout": 60,
     "echo_pool": False,
     "pool_use_lifo": True,
+    "poolclass": TimedQueuePool,  # QueuePool that reports checkout wait to /metrics
 }
 
+
+def _create_engine(db_type: DatabaseType, url: str):
+    """Create an engine with the shared pool settings and query metrics attached"""
+    db_engine = create_engine(url, pool_logging_name=db_type.value, **POOL_SETTINGS)
+    instrument_engine(db_engine, db_type.value)
+    attach_deadlines(db_engine)
+    if settings.DB_DIAGNOSTICS_ENABLED:
+        attach_diagnostics(db_engine, db_type.value)
+    return db_engine
+
+
 # Create engines for each database
 engines = {
 
-    DatabaseType.USERS: create_engine(settings.DATABASE_URL_USERS, **POOL_SETTINGS),
-    DatabaseType.ORDERS: create_engine(settings.DATABASE_URL_ORDERS, **POOL_SETTINGS),
-    DatabaseType.CLIENTS: create_engine(settings.DATABASE_URL_CLIENTS, **POOL_SETTINGS),
+    DatabaseType.USERS: _create_engine(DatabaseType.USERS, settings.DATABASE_URL_USERS),
+    DatabaseType.ORDERS: _create_engine(DatabaseType.ORDERS, settings.DATABASE_URL_ORDERS),
+    DatabaseType.CLIENTS: _create_engine(DatabaseType.CLIENTS, settings.DATABASE_URL_CLIENTS),
 
-    DatabaseType.USERS_IMPLEMENTATION: create_engine(settings.DATABASE_URL_USERS_IMPLEMENTATION, **POOL_SETTINGS),
-    DatabaseType.END_DEVICE: create_engine(settings.DATABASE_URL_END_DEVICE, **POOL_SETTINGS),
-    DatabaseType.GATEWAY: create_engine(settings.DATABASE_URL_GATEWAY, **POOL_SETTINGS),
+    DatabaseType.USERS_IMPLEMENTATION: _create_engine(DatabaseType.USERS_IMPLEMENTATION, settings.DATABASE_URL_USERS_IMPLEMENTATION),
+    DatabaseType.END_DEVICE: _create_engine(DatabaseType.END_DEVICE, settings.DATABASE_URL_END_DEVICE),
+    DatabaseType.GATEWAY: _create_engine(DatabaseType.GATEWAY, settings.DATABASE_URL_GATEWAY),
 
 }
 
@@ -68,6 +82,17 @@ BaseEndDevice = declarative_base()
 BaseGateway = declarative_base()
 
 
+# Idempotent PostgreSQL DDL run after create_all on every startup.
+# create_all only creates missing tables, so type changes and indexes on
+# tables that already exist are registered here by the model modules.
+SCHEMA_UPGRADES = {db_type: [] for db_type in DatabaseType}
+
+
+def register_schema_upgrade(db_type: DatabaseType, statement: str):
+    """Register an idempotent DDL statement to run for a database in init_db"""
+    SCHEMA_UPGRADES[db_type].append(statement)
+
+
 # Legacy aliases for backward compatibility
 engine = engines[DatabaseType.USERS]
 
@@ -145,6 +170,10 @@ def init_db():
             try:
                 logger.info(f"Connecting to {db_name} database (attempt {attempt + 1}/{max_retries})...")
                 base_class.metadata.create_all(bind=engines[db_type])
+                if engines[db_type].dialect.name == "postgresql" and SCHEMA_UPGRADES[db_type]:
+                    with engines[db_type].begin() as conn:
+                        for statement in SCHEMA_UPGRADES[db_type]:
+                            conn.execute(text(statement))
                 logger.info(f"{db_name} database tables created successfully!")
                 break
             except OperationalError as e:
@@ -0,0 +1,155 @@
+"""
+Database Diagnostics
+Opt-in (DB_DIAGNOSTICS_ENABLED) per-request SQL accounting: statement counts,
+total DB time, slowest statements and repeated statements (likely N+1), with a
+Server-Timing header on every response.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_stats: contextvars.ContextVar[Optional["RequestQueryStats"]] = contextvars.ContextVar(
+    "db_diagnostics_stats", default=None
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%\(\w+\)s|\?|%s)\s*,?)+\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and IN-lists so equivalent statements group together"""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _PLACEHOLDER_LIST.sub("(...)", sql)
+
+
+def bind_shape(parameters: Any, executemany: bool) -> str:
+    """Parameter names and types without values, e.g. {end_device_ID_1: str}"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = bind_shape(parameters[0], False) if parameters else "{}"
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return "{}"
+
+
+class RequestQueryStats:
+    """SQL statements observed while serving one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.per_database: Dict[str, float] = {}
+        self.statements: List[Dict[str, Any]] = []
+
+    def record(self, database: str, statement: str, parameters: Any, executemany: bool, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.per_database[database] = self.per_database.get(database, 0.0) + elapsed_ms
+        self.statements.append({
+            "database": database,
+            "sql": normalize_sql(statement),
+            "binds": bind_shape(parameters, executemany),
+            "ms": round(elapsed_ms, 2),
+        })
+
+    def repeated(self) -> List[tuple]:
+        counts = Counter((s["database"], s["sql"]) for s in self.statements)
+        return [
+            (database, sql, n) for (database, sql), n in counts.most_common()
+            if n >= settings.DB_DIAGNOSTICS_REPEAT_THRESHOLD
+        ]
+
+    def server_timing(self) -> str:
+        entries = [f'db;dur={self.total_ms:.2f};desc="{self.count} queries"']
+        entries += [f"db-{database};dur={ms:.2f}" for database, ms in sorted(self.per_database.items())]
+        return ", ".join(entries)
+
+
+def attach_diagnostics(engine, database: str):
+    """Time every statement on an engine into the current request's stats"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("diagnostics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["diagnostics_query_start"].pop()) * 1000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(database, statement, parameters, executemany, elapsed_ms)
+        if elapsed_ms >= settings.DB_DIAGNOSTICS_SLOW_QUERY_MS:
+            logger.warning(
+                f"Slow query on {database} ({elapsed_ms:.1f} ms): {normalize_sql(statement)} "
+                f"binds={bind_shape(parameters, executemany)}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("diagnostics_query_start"):
+            conn.info["diagnostics_query_start"].pop()
+
+
+class DBDiagnosticsMiddleware:
+    """
+    Collects RequestQueryStats for each HTTP request, adds a Server-Timing
+    header, and logs requests over the query-count or DB-time budget.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: RequestQueryStats):
+        repeated = stats.repeated()
+        over_count = stats.count > settings.DB_DIAGNOSTICS_MAX_QUERIES
+        over_time = stats.total_ms > settings.DB_DIAGNOSTICS_MAX_DB_MS
+        if not (over_count or over_time or repeated):
+            return
+
+        lines = [
+            f"DB budget exceeded: {scope['method']} {scope['path']} ran {stats.count} queries "
+            f"in {stats.total_ms:.1f} ms"
+        ]
+        for database, sql, n in repeated:
+            lines.append(f"  possible N+1: {n}x on {database}: {sql}")
+        slowest = sorted(stats.statements, key=lambda s: s["ms"], reverse=True)[:settings.DB_DIAGNOSTICS_TOP_N]
+        for s in slowest:
+            lines.append(f"  {s['ms']} ms on {s['database']}: {s['sql']} binds={s['binds']}")
+        logger.warning("\n".join(lines))
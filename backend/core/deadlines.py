@@ -0,0 +1,175 @@
+"""
+Request Deadlines
+Each HTTP request gets a database time budget: the STATEMENT_TIMEOUT_MS value
+for its route class (see core.admission.route_class), shortened by an
+incoming REQUEST_DEADLINE_HEADER (remaining milliseconds, e.g. from a proxy
+or a client with its own timeout). On PostgreSQL every transaction the
+request opens starts with `SET LOCAL statement_timeout` set to the time that
+remains, so a query cannot outlive the request. If the client disconnects
+first, its in-flight queries are cancelled.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import route_class
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before a database transaction could start"""
+
+
+class RequestDeadline:
+    def __init__(self, route_class: str, deadline: float):
+        self.route_class = route_class
+        self.deadline = deadline  # time.monotonic() value
+        self.connections: Set = set()  # DBAPI connections with a transaction open for this request
+        self.disconnected = False
+
+    def remaining_ms(self) -> int:
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+_current_deadline: contextvars.ContextVar[Optional[RequestDeadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+# DBAPI connection id -> owning request; cleared on pool checkin so a connection
+# handed to another request is never cancelled on the first one's behalf
+_owners: Dict[int, RequestDeadline] = {}
+_owners_lock = threading.Lock()
+
+
+def current_deadline() -> Optional[RequestDeadline]:
+    return _current_deadline.get()
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    deadline = _current_deadline.get()
+    if deadline is None or connection.dialect.name != "postgresql":
+        return
+    remaining = deadline.remaining_ms()
+    if remaining <= 0 or deadline.disconnected:
+        raise DeadlineExceeded(f"{deadline.route_class} request deadline passed before the query started")
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining}")
+
+    dbapi_connection = connection.connection.dbapi_connection
+    with _owners_lock:
+        _owners[id(dbapi_connection)] = deadline
+        deadline.connections.add(dbapi_connection)
+
+
+def attach_deadlines(db_engine):
+    """Forget request ownership when a connection goes back to the pool"""
+    @event.listens_for(db_engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        with _owners_lock:
+            owner = _owners.pop(id(dbapi_connection), None)
+            if owner is not None:
+                owner.connections.discard(dbapi_connection)
+
+
+def is_query_cancelled(exc: Exception) -> bool:
+    """PostgreSQL query_canceled (57014): statement_timeout or a disconnect cancel"""
+    return getattr(getattr(exc, "orig", None), "pgcode", None) == "57014"
+
+
+def reraise_deadline_errors(exc: Exception):
+    """
+    For route handlers that turn any exception into a 500: let an expired
+    deadline or a cancelled query through to the 504 handlers in main.py
+    (call after db.rollback(), before logging the error as a failure).
+    """
+    if isinstance(exc, DeadlineExceeded) or is_query_cancelled(exc):
+        raise exc
+
+
+def _cancel_queries(deadline: RequestDeadline):
+    """Runs in a worker thread: psycopg2's cancel() opens its own connection to the server"""
+    with _owners_lock:
+        for dbapi_connection in list(deadline.connections):
+            if _owners.get(id(dbapi_connection)) is deadline and hasattr(dbapi_connection, "cancel"):
+                try:
+                    dbapi_connection.cancel()
+                except Exception as e:
+                    logger.warning(f"Query cancel after client disconnect failed: {e}")
+
+
+def _budget_ms(scope: Scope, name: str) -> Optional[int]:
+    budget = settings.STATEMENT_TIMEOUT_MS.get(name, 0) or None
+    requested = Headers(scope=scope).get(settings.REQUEST_DEADLINE_HEADER)
+    if requested and requested.isdigit():
+        budget = min(budget, int(requested)) if budget else int(requested)
+    return budget
+
+
+class DeadlineMiddleware:
+    """Sets the request's database deadline and cancels its queries if the client goes away"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        name = route_class(scope) if scope["type"] == "http" else None
+        budget = _budget_ms(scope, name) if name else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = RequestDeadline(name, time.monotonic() + budget / 1000)
+        token = _current_deadline.set(deadline)
+        if not settings.CANCEL_ON_DISCONNECT:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current_deadline.reset(token)
+            return
+
+        # Once the body has been read, keep listening for http.disconnect on the
+        # app's behalf; later receive() calls from the app are served from `pending`
+        pending: asyncio.Queue = asyncio.Queue()
+        body_done = asyncio.Event()
+        headers = Headers(scope=scope)
+        if headers.get("content-length", "0") == "0" and "transfer-encoding" not in headers:
+            body_done.set()  # Nothing to read first (GET); a bodyless http.request is queued for the app
+
+        async def receive_wrapper() -> Message:
+            if body_done.is_set():
+                return await pending.get()
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                deadline.disconnected = True
+            if message["type"] == "http.disconnect" or not message.get("more_body", False):
+                body_done.set()
+            return message
+
+        async def watch_disconnect():
+            await body_done.wait()
+            while True:
+                message = await receive()
+                await pending.put(message)
+                if message["type"] == "http.disconnect":
+                    deadline.disconnected = True
+                    if deadline.connections:
+                        logger.info(f"Client disconnected from {scope['path']}; cancelling its queries")
+                        await asyncio.to_thread(_cancel_queries, deadline)
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await self.app(scope, receive_wrapper, send)
+        finally:
+            watcher.cancel()
+            _current_deadline.reset(token)
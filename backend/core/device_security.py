@@ -1,9 +1,15 @@
+import hmac
+
 from fastapi import Security, HTTPException, status
 from fastapi.security import APIKeyHeader
 from core.config import settings
 
 api_key_header = APIKeyHeader(name="X-IOT-Token", auto_error=False)
 
+def is_valid_device_token(token: str) -> bool:
+    """Constant-time check of a device token; shared by HTTP ingest and the ingestion listener"""
+    return bool(token) and hmac.compare_digest(token.encode(), settings.IOT_DEVICE_ACCESS_TOKEN.encode())
+
 async def verify_device_token(api_key: str = Security(api_key_header)):
     """
     Verifies the IOT device token from the 'X-IOT-Token' header.
@@ -15,7 +21,7 @@ async def verify_device_token(api_key: str = Security(api_key_header)):
             detail="Missing Authentication Token (X-IOT-Token header)"
         )
     
-    if api_key != settings.IOT_DEVICE_ACCESS_TOKEN:
+    if not is_valid_device_token(api_key):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Authentication Token"
@@ -0,0 +1,58 @@
+"""
+Concurrent Fan-out Helpers
+Run blocking calls (e.g. one query per database engine) in parallel threads
+with per-call timeouts, and cache the combined result for a short TTL.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+async def run_concurrently(calls: Dict[str, Callable[[], Any]], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Run each blocking callable in a worker thread, all at once, off the event loop.
+    Returns {name: {"ok": True, "value": ..., "elapsed_ms": ...}} or
+    {name: {"ok": False, "error": ..., "elapsed_ms": ...}} per call; one slow or
+    failing call never holds up or fails the others.
+    """
+    async def run_one(call: Callable[[], Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(asyncio.to_thread(call), timeout)
+            result = {"ok": True, "value": value}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"timed out after {timeout}s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    names = list(calls)
+    results = await asyncio.gather(*(run_one(calls[name]) for name in names))
+    return dict(zip(names, results))
+
+
+class AsyncTTLCache:
+    """
+    Tiny per-process cache for expensive async results. Concurrent callers for
+    the same key wait on a single computation instead of starting their own.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = await compute()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
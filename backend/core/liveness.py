@@ -0,0 +1,245 @@
+"""
+Device Liveness
+Ingest records last-seen per end device / gateway; a device is online until
+it misses LIVENESS_MISSED_HEARTBEATS intervals (a gateway's interval is its
+gateway_stats_interval, end devices use LIVENESS_DEFAULT_INTERVAL_SECONDS).
+
+Without Redis the state lives in this process and expiries sit in a hashed
+timer wheel: each heartbeat moves the device to the slot of its new expiry
+tick (O(1)), and each tick only inspects the slot it lands on. With REDIS_URL
+set, last-seen and expiry live in Redis (a hash and a sorted set) so every
+worker reports the same fleet, and the expiry sweep is a ZRANGEBYSCORE where
+the worker whose ZREM succeeds raises the offline alert exactly once.
+
+In-process state only works with a single worker: each Gunicorn worker would
+see a fraction of the heartbeats and raise false offline alerts. With several
+workers (GUNICORN_WORKERS, exported by gunicorn.conf.py) and no Redis,
+tracking is switched off and every device reports "unknown".
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+from pydantic import BaseModel
+
+from .config import settings
+from .metrics import DEVICES_WENT_OFFLINE
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "liveness:"
+
+
+class DeviceStatus(BaseModel):
+    id: str
+    status: str  # online | offline | unknown (no heartbeat recorded)
+    last_seen: Optional[datetime] = None
+    interval_seconds: int
+
+
+class FleetStatus(BaseModel):
+    online: int
+    offline: int
+    unknown: int
+    items: List[DeviceStatus]
+
+
+def parse_interval(value: Optional[str]) -> int:
+    """gateway_stats_interval is stored as a seconds string ("60", "300", "900")"""
+    try:
+        seconds = int(str(value).strip().rstrip("s"))
+    except (TypeError, ValueError):
+        return settings.LIVENESS_DEFAULT_INTERVAL_SECONDS
+    return seconds if seconds > 0 else settings.LIVENESS_DEFAULT_INTERVAL_SECONDS
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel keyed by device ID. Slots hold {device_id: expiry_tick};
+    an expiry further out than one revolution simply stays in its slot until
+    the wheel comes round to a tick at or past it.
+    """
+
+    def __init__(self, slots: int, tick_seconds: float):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[str, int]] = [{} for _ in range(slots)]
+        self._expiry: Dict[str, int] = {}
+        self._current = self.tick_of(time.time())
+
+    def tick_of(self, timestamp: float) -> int:
+        return int(timestamp / self.tick_seconds)
+
+    def schedule(self, device_id: str, expires_at: float):
+        old = self._expiry.get(device_id)
+        if old is not None:
+            self._slots[old % len(self._slots)].pop(device_id, None)
+        tick = max(self.tick_of(expires_at), self._current + 1)
+        self._expiry[device_id] = tick
+        self._slots[tick % len(self._slots)][device_id] = tick
+
+    def advance(self, now: float) -> List[str]:
+        """Move to `now`; returns devices whose expiry tick has passed"""
+        target = self.tick_of(now)
+        # After a stall longer than one revolution, visiting every slot once is enough
+        steps = min(target - self._current, len(self._slots))
+        expired = []
+        for tick in range(target - steps + 1, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            due = [device_id for device_id, expiry in slot.items() if expiry <= target]
+            for device_id in due:
+                del slot[device_id]
+                del self._expiry[device_id]
+            expired.extend(due)
+        self._current = max(self._current, target)
+        return expired
+
+    def expiry(self, device_id: str) -> Optional[float]:
+        tick = self._expiry.get(device_id)
+        return tick * self.tick_seconds if tick is not None else None
+
+
+class LivenessTracker:
+    """Last-seen and online state for one kind of device ("end_device" or "gateway")"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._last_seen: Dict[str, float] = {}
+        self._wheel = TimerWheel(settings.LIVENESS_WHEEL_SLOTS, settings.LIVENESS_TICK_SECONDS)
+        self._redis: Optional[redis.Redis] = None
+        self.enabled = True  # False when state would be per worker (see module docstring)
+
+    def use_redis(self, client: Optional[redis.Redis]):
+        self._redis = client
+
+    def _keys(self) -> Tuple[str, str]:
+        return REDIS_KEY_PREFIX + self.kind + ":seen", REDIS_KEY_PREFIX + self.kind + ":expiry"
+
+    def seen(self, device_id: str, interval_seconds: int, at: Optional[float] = None):
+        """Record a heartbeat; safe to call from sync route handlers and never raises into ingest"""
+        if not self.enabled:
+            return
+        at = at or time.time()
+        expires_at = at + interval_seconds * settings.LIVENESS_MISSED_HEARTBEATS
+        try:
+            if self._redis is not None:
+                seen_key, expiry_key = self._keys()
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.hset(seen_key, device_id, at)
+                pipe.zadd(expiry_key, {device_id: expires_at})
+                pipe.execute()
+                return
+            with self._lock:
+                self._last_seen[device_id] = at
+                self._wheel.schedule(device_id, expires_at)
+        except Exception as e:
+            logger.warning(f"Liveness update for {self.kind} {device_id} failed: {e}")
+
+    def sweep(self, now: Optional[float] = None) -> List[str]:
+        """Devices that just went offline (each reported once)"""
+        if not self.enabled:
+            return []
+        now = now or time.time()
+        if self._redis is not None:
+            _, expiry_key = self._keys()
+            due = [member.decode() for member in self._redis.zrangebyscore(expiry_key, 0, now)]
+            return [device_id for device_id in due if self._redis.zrem(expiry_key, device_id)]
+        with self._lock:
+            return self._wheel.advance(now)
+
+    def status(self, devices: Iterable[Tuple[str, int]]) -> FleetStatus:
+        """Status for (device_id, interval_seconds) pairs, in the given order"""
+        devices = list(devices)
+        ids = [device_id for device_id, _ in devices]
+        now = time.time()
+        if self._redis is not None and ids:
+            seen_key, expiry_key = self._keys()
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.hmget(seen_key, ids)
+            pipe.zmscore(expiry_key, ids)
+            seen_values, expiries = pipe.execute()
+            last_seen = [float(v) if v is not None else None for v in seen_values]
+        elif not self.enabled:
+            last_seen, expiries = [None] * len(ids), [None] * len(ids)
+        else:
+            with self._lock:
+                last_seen = [self._last_seen.get(device_id) for device_id in ids]
+                expiries = [self._wheel.expiry(device_id) for device_id in ids]
+
+        items, counts = [], {"online": 0, "offline": 0, "unknown": 0}
+        for (device_id, interval), seen_at, expiry in zip(devices, last_seen, expiries):
+            if seen_at is None:
+                state = "unknown"
+            else:
+                state = "online" if expiry is not None and expiry > now else "offline"
+            counts[state] += 1
+            items.append(DeviceStatus(
+                id=device_id,
+                status=state,
+                last_seen=datetime.fromtimestamp(seen_at, timezone.utc) if seen_at else None,
+                interval_seconds=interval,
+            ))
+        return FleetStatus(items=items, **counts)
+
+
+end_device_liveness = LivenessTracker("end_device")
+gateway_liveness = LivenessTracker("gateway")
+TRACKERS = (end_device_liveness, gateway_liveness)
+
+
+class LivenessMonitor:
+    """Background tick: sweeps every tracker and raises offline alerts"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._redis: Optional[redis.Redis] = None
+
+    async def start(self):
+        if settings.REDIS_URL:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+            logger.info("Device liveness state kept in Redis")
+        workers = int(os.environ.get("GUNICORN_WORKERS", "1"))
+        in_memory_ok = self._redis is not None or workers <= 1
+        if not in_memory_ok:
+            logger.warning(f"Device liveness disabled: {workers} workers and no REDIS_URL; "
+                           "set REDIS_URL for offline alerts and /status endpoints")
+        for tracker in TRACKERS:
+            tracker.use_redis(self._redis)
+            tracker.enabled = in_memory_ok
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for tracker in TRACKERS:
+            tracker.use_redis(None)
+        if self._redis:
+            self._redis.close()
+            self._redis = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.LIVENESS_TICK_SECONDS)
+            for tracker in TRACKERS:
+                try:
+                    expired = await asyncio.to_thread(tracker.sweep) if self._redis else tracker.sweep()
+                except Exception as e:
+                    logger.warning(f"Liveness sweep for {tracker.kind} failed: {e}")
+                    continue
+                for device_id in expired:
+                    DEVICES_WENT_OFFLINE.labels(tracker.kind).inc()
+                    logger.warning(f"{tracker.kind} {device_id} went offline: missed "
+                                   f"{settings.LIVENESS_MISSED_HEARTBEATS} heartbeats")
+
+
+liveness_monitor = LivenessMonitor()
@@ -1,35 +1,134 @@
 """
 Structured Logging Configuration
+Configured once per process. Loggers only enqueue records (QueueHandler);
+a background QueueListener thread does the formatting and stdout I/O, so
+logging adds no blocking write to the request path.
 """
+import atexit
+import copy
+import itertools
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from pythonjsonlogger import jsonlogger
+from datetime import datetime, timezone
+
+import orjson
+
 from .config import settings
 
-def setup_logging():
-    """Configure structured JSON logging for production"""
-    logger = logging.getLogger()
-    
-    # Remove default handlers
-    for handler in logger.handlers:
-        logger.removeHandler(handler)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    
+# Loggers that uvicorn configures with their own (synchronous) stream handlers
+SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Standard LogRecord attributes; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_listener_pid = None
+
+
+class OrjsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, extras, exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N sub-WARNING records for the loggers in LOG_SAMPLING
+    (e.g. per-message telemetry ingest logs). Warnings and errors always pass.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._counters = {name: itertools.count() for name in rates}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                if self.rates[name] <= 0:
+                    return False  # Rate 0 drops every info/debug record
+                return next(self._counters[name]) % self.rates[name] == 0
+            name = name.rpartition(".")[0]
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue the record as-is. The stock prepare() formats on the calling
+    thread; here only the %-args are merged so formatting (including
+    tracebacks) happens on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
     if settings.ENVIRONMENT == "production":
-        # JSON formatting for production
-        formatter = jsonlogger.JsonFormatter(
-            fmt='%(asctime)s %(levelname)s %(name)s %(message)s'
-        )
-        logger.setLevel(logging.INFO)
-    else:
-        # Standard formatting for development
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        logger.setLevel(logging.DEBUG)
-        
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    
-    return logger
+        return OrjsonFormatter()
+    return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _stop_listener():
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+
+def setup_logging():
+    """
+    Configure the root logger once per process and return it. Safe to call
+    repeatedly (and after a fork: the child gets its own listener thread).
+    Modules should use logging.getLogger(__name__) rather than calling this.
+    """
+    global _listener, _listener_pid
+    root = logging.getLogger()
+    if _listener is not None and _listener_pid == os.getpid():
+        return root
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    if settings.LOG_SAMPLING:
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO if settings.ENVIRONMENT == "production" else logging.DEBUG)
+
+    # Route uvicorn's own output through the same queue
+    for name in SERVER_LOGGERS:
+        server_logger = logging.getLogger(name)
+        for handler in list(server_logger.handlers):
+            server_logger.removeHandler(handler)
+        server_logger.propagate = True
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_formatter())
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    if _listener_pid is None:
+        atexit.register(_stop_listener)
+    _listener_pid = os.getpid()
+
+    return root
@@ -0,0 +1,153 @@
+"""
+Prometheus Metrics
+Per-route HTTP metrics, per-database query and pool metrics, and telemetry
+ingest counters. When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py)
+every Gunicorn worker writes to shared files and /metrics aggregates them.
+"""
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests in flight", ["method"], multiprocess_mode="livesum"
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ["method", "route"], buckets=SIZE_BUCKETS
+)
+
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed", ["database"]
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["database"], buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["database"],
+    buckets=LATENCY_BUCKETS
+)
+
+COALESCED_REQUESTS = Counter(
+    "http_coalesced_requests_total", "Single-flight GETs by outcome", ["outcome"]
+)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests shed with 503 by admission control", ["route_class", "reason"]
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a slot", ["route_class"],
+    buckets=LATENCY_BUCKETS
+)
+
+DEVICES_WENT_OFFLINE = Counter(
+    "devices_went_offline_total", "Devices that missed LIVENESS_MISSED_HEARTBEATS heartbeats", ["kind"]
+)
+
+TELEMETRY_INGESTED = Counter(
+    "telemetry_ingested_rows_total", "Telemetry rows stored", ["kind"]
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, labelled by pool_logging_name"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(getattr(self, "_orig_logging_name", None) or "unknown").observe(time.perf_counter() - started)
+
+
+# SQLAlchemy names pool loggers after the pool class ("core.metrics.TimedQueuePool.<db>"), outside the
+# WARNING-defaulted "sqlalchemy" tree; pin them so a DEBUG root doesn't log every checkout and checkin
+logging.getLogger(f"{__name__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+def instrument_engine(engine, database: str):
+    """Count and time every statement executed through an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        DB_QUERIES.labels(database).inc()
+        DB_QUERY_LATENCY.labels(database).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request count, latency, in-flight and response size per route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.labels(method).dec()
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_label = getattr(route, "path_format", None) or "unmatched"
+            HTTP_REQUESTS.labels(method, route_label, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route_label).observe(time.perf_counter() - started)
+            HTTP_RESPONSE_SIZE.labels(method, route_label).observe(response_size)
+
+
+def render_metrics():
+    """Exposition payload; aggregates all workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
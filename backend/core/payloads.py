@@ -0,0 +1,190 @@
+"""
+Telemetry Payload Decoding
+Content-negotiated ingest bodies: JSON, MessagePack or CBOR. The payload map is
+decoded straight to a dict, skipping generic Pydantic validation of Dict[str, Any].
+Bulk uploads are NDJSON (optionally gzip-encoded), split into lines as the
+request body streams in.
+"""
+import math
+import zlib
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Type
+
+import cbor2
+import msgpack
+import orjson
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel
+
+
+def _decode_msgpack(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+DECODERS = {
+    "application/json": orjson.loads,
+    "application/msgpack": _decode_msgpack,
+    "application/x-msgpack": _decode_msgpack,
+    "application/vnd.msgpack": _decode_msgpack,
+    "application/cbor": cbor2.loads,
+}
+
+
+def decode_body(body: bytes, content_type: str) -> Any:
+    """Decode a request body according to its Content-Type (defaults to JSON)"""
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    decoder = DECODERS.get(media_type)
+    if decoder is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Type '{media_type}'. Use one of: {', '.join(DECODERS)}"
+        )
+    try:
+        return decoder(body)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed {media_type} body: {e}"
+        )
+
+
+def json_problem(value: Any, path: str = "data") -> Optional[str]:
+    """
+    Where `value` stops being storable as JSON, or None. MessagePack and CBOR
+    can carry bytes, extension types, tagged values (datetimes, decimals...),
+    non-string keys and NaN, none of which the JSON column accepts.
+    """
+    if value is None or isinstance(value, (str, bool, int)):
+        return None
+    if isinstance(value, float):
+        return None if math.isfinite(value) else f"{path} is not a finite number"
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(key, str):
+                return f"{path} has a non-string key {key!r}"
+            problem = json_problem(item, f"{path}.{key}")
+            if problem:
+                return problem
+        return None
+    if isinstance(value, list):
+        for index, item in enumerate(value):
+            problem = json_problem(item, f"{path}[{index}]")
+            if problem:
+                return problem
+        return None
+    return f"{path} has unsupported type {type(value).__name__}"
+
+
+def extract_data(document: Any) -> Dict[str, Any]:
+    """Validate the {"data": {...}} envelope shared by every ingest format"""
+    if not isinstance(document, dict) or not isinstance(document.get("data"), dict):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Telemetry body must be an object with a 'data' map"
+        )
+    problem = json_problem(document["data"])
+    if problem:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Telemetry values must be JSON types: {problem}"
+        )
+    return document["data"]
+
+
+async def telemetry_payload(request: Request) -> Dict[str, Any]:
+    """Dependency returning the decoded telemetry `data` map"""
+    body = await request.body()
+    return extract_data(decode_body(body, request.headers.get("content-type")))
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+# Cap on decompressed bytes produced per call, so a gzip bomb cannot balloon one chunk
+INFLATE_STEP_BYTES = 1024 * 1024
+
+
+async def _inflated(request: Request) -> AsyncIterator[bytes]:
+    """Request body chunks, gunzipped incrementally when Content-Encoding is gzip"""
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding in ("", "identity"):
+        async for chunk in request.stream():
+            yield chunk
+        return
+    if encoding not in ("gzip", "x-gzip"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding '{encoding}'. Use gzip or identity"
+        )
+
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in request.stream():
+        while chunk:
+            try:
+                output = inflater.decompress(chunk, INFLATE_STEP_BYTES)
+            except zlib.error as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed gzip body: {e}")
+            if output:
+                yield output
+            chunk = inflater.unconsumed_tail
+            if inflater.eof and inflater.unused_data:
+                # Concatenated gzip members (e.g. a gateway appending to its spool file)
+                chunk = inflater.unused_data + chunk
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+async def ndjson_lines(request: Request, max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line_number, line) from an NDJSON request body without holding more
+    than one partial line in memory. Blank lines are skipped; a line longer than
+    max_line_bytes is discarded and yielded as (line_number, None).
+    """
+    media_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if media_type not in NDJSON_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Type '{media_type}'. Use one of: {', '.join(NDJSON_MEDIA_TYPES)}"
+        )
+
+    line_number = 0
+    pending = bytearray()
+    oversized = False
+    async for chunk in _inflated(request):
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    pending += chunk[start:]
+                    if len(pending) > max_line_bytes:
+                        oversized = True  # Drop the rest of this line as it arrives
+                        pending.clear()
+                break
+            line_number += 1
+            if oversized:
+                yield line_number, None
+            else:
+                pending += chunk[start:end]
+                if len(pending) > max_line_bytes:
+                    yield line_number, None
+                elif pending.strip():
+                    yield line_number, bytes(pending)
+            pending.clear()
+            oversized = False
+            start = end + 1
+
+    if oversized or pending.strip():
+        line_number += 1
+        yield line_number, None if oversized else bytes(pending)
+
+
+def telemetry_request_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting the negotiated body, since it bypasses FastAPI parsing"""
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                "application/msgpack": {"schema": schema},
+                "application/cbor": {"schema": schema},
+            },
+        }
+    }
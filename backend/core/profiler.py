@@ -0,0 +1,205 @@
+"""
+Sampling Profiler
+Low-overhead wall-clock sampler for a running worker: a background thread
+snapshots every thread's stack with sys._current_frames() at a fixed interval.
+Output is collapsed stacks (flamegraph.pl / speedscope import) or speedscope JSON.
+"""
+import collections
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Leaf functions of threads that are parked rather than doing work
+IDLE_FUNCTIONS = {"wait", "select", "poll", "epoll", "_worker", "accept", "get", "sleep", "_wait_for_tstate_lock"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Aggregates sampled stacks (root -> leaf) into counts"""
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False, exclude_threads: Tuple[int, ...] = ()):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.exclude_threads = set(exclude_threads)
+        self.samples: collections.Counter = collections.Counter()
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        skip = self.exclude_threads | {threading.get_ident()}
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in skip:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[tuple(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format: `root;child;leaf count` per line"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """speedscope.app sampled-profile JSON"""
+        frame_index: Dict[str, int] = {}
+        frames = []
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "exporter": "southern-iot-sampling-profiler",
+        }
+
+
+# One worker-wide profile at a time; per-request profiles are kept in a small ring
+_session_lock = threading.Lock()
+_recent: "collections.OrderedDict[str, Tuple[str, SamplingProfiler]]" = collections.OrderedDict()
+RECENT_PROFILES = 20
+
+
+def profile_for(seconds: float, interval: float) -> Optional[SamplingProfiler]:
+    """Sample this worker for `seconds` (blocking); None if another profile is already running"""
+    if not _session_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(interval=interval, exclude_threads=(threading.get_ident(),))
+        profiler.start()
+        time.sleep(seconds)
+        profiler.stop()
+        return profiler
+    finally:
+        _session_lock.release()
+
+
+def store_profile(label: str, profiler: SamplingProfiler, profile_id: Optional[str] = None) -> str:
+    profile_id = profile_id or uuid.uuid4().hex[:12]
+    _recent[profile_id] = (label, profiler)
+    while len(_recent) > RECENT_PROFILES:
+        _recent.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id: str) -> Optional[Tuple[str, SamplingProfiler]]:
+    return _recent.get(profile_id)
+
+
+def _profile_to_file(seconds: float):
+    profiler = profile_for(seconds, settings.PROFILER_INTERVAL_MS / 1000)
+    if profiler is None:
+        logger.warning("Profiler signal ignored: a profile is already running")
+        return
+    os.makedirs(settings.PROFILER_OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILER_OUTPUT_DIR, f"profile-{os.getpid()}-{int(time.time())}.collapsed")
+    with open(path, "w") as f:
+        f.write(profiler.collapsed())
+    logger.info(f"Profile written to {path}")
+
+
+def install_signal_handler():
+    """`kill -USR2 <worker pid>` samples that worker for PROFILER_SIGNAL_SECONDS into PROFILER_OUTPUT_DIR"""
+    if not hasattr(signal, "SIGUSR2") or threading.current_thread() is not threading.main_thread():
+        return
+
+    def handler(signum, frame):
+        threading.Thread(
+            target=_profile_to_file, args=(settings.PROFILER_SIGNAL_SECONDS,), daemon=True
+        ).start()
+
+    signal.signal(signal.SIGUSR2, handler)
+
+
+class ProfileRequestMiddleware:
+    """
+    Per-request profiling: a request carrying `X-Profile: 1` and a valid
+    X-Admin-Token is sampled while it runs. The response gets an X-Profile-Id
+    header; fetch the result from /api/v1/admin/profile/{id}.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not (
+            headers.get("x-profile")
+            and settings.ADMIN_ACCESS_TOKEN
+            and headers.get("x-admin-token") == settings.ADMIN_ACCESS_TOKEN
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        profiler = SamplingProfiler(interval=settings.PROFILER_INTERVAL_MS / 1000)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            store_profile(f"{scope['method']} {scope['path']}", profiler, profile_id)
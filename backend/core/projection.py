@@ -0,0 +1,66 @@
+"""
+Sparse Fieldsets
+`fields=id,client_name` and `view=summary` on list endpoints: the selected
+columns are pushed into the SELECT list and the response is serialized with
+a model holding only those fields, so dropdowns do not load or ship Text
+columns such as `address` and `order_desc`.
+"""
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+class Projection:
+    """Fieldset support for one list endpoint: full response schema, ORM model and named views"""
+
+    def __init__(self, schema: Type[BaseModel], model, views: Dict[str, List[str]]):
+        self.schema = schema
+        self.model = model
+        self.views = views
+
+    def resolve(self, fields: Optional[str], view: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Requested field names (id always included), or None for the full schema"""
+        if not fields and not view:
+            return None
+        if fields:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+        elif view in self.views:
+            names = self.views[view]
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown view '{view}'; available: {', '.join(sorted(self.views))}"
+            )
+        unknown = [name for name in names if name not in self.schema.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field(s): {', '.join(unknown)}"
+            )
+        return tuple(dict.fromkeys(["id", *names]))
+
+    def select(self, query, names: Tuple[str, ...]):
+        """Restrict an ORM query to the projected columns (rows come back as tuples)"""
+        return query.with_entities(*(getattr(self.model, name) for name in names))
+
+    def respond(self, rows, names: Tuple[str, ...], headers: Optional[Mapping[str, str]] = None) -> Response:
+        adapter = _list_adapter(self.schema, names)
+        return Response(
+            content=adapter.dump_json(adapter.validate_python(rows)),
+            media_type="application/json",
+            headers=dict(headers or {}),
+        )
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(schema: Type[BaseModel], names: Tuple[str, ...]) -> TypeAdapter:
+    """List[<schema restricted to names>], built once per distinct fieldset"""
+    partial = create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names},
+    )
+    return TypeAdapter(List[partial])
@@ -0,0 +1,224 @@
+"""
+Live Telemetry Pub/Sub
+In-process fan-out of newly ingested readings to SSE / WebSocket subscribers.
+When REDIS_URL is configured, readings are published through Redis so every
+worker's subscribers see ingests handled by any other worker.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL_PREFIX = "telemetry:"
+
+
+class Subscription:
+    """
+    A single connection's view of the broker: one bounded queue fed by any
+    number of channels. When the consumer falls behind, the oldest buffered
+    readings are dropped and counted instead of growing memory without bound.
+    """
+
+    def __init__(self, broker: "TelemetryBroker", maxsize: int):
+        self.broker = broker
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.channels: Set[str] = set()
+        self.dropped = 0
+
+    def add(self, channels: Iterable[str]):
+        for channel in channels:
+            if channel not in self.channels:
+                self.channels.add(channel)
+                self.broker._subscribers.setdefault(channel, set()).add(self)
+
+    def remove(self, channels: Iterable[str]):
+        for channel in channels:
+            self.channels.discard(channel)
+            subscribers = self.broker._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(self)
+                if not subscribers:
+                    del self.broker._subscribers[channel]
+
+    def close(self):
+        self.remove(list(self.channels))
+
+    def offer(self, message: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next reading, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class TelemetryBroker:
+    """Channel-keyed fan-out; all subscriber bookkeeping happens on the event loop"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis: Optional[redis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if settings.REDIS_URL:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+            self._listener = asyncio.create_task(self._listen_redis())
+            logger.info("Telemetry broker bridged through Redis pub/sub")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis:
+            self._redis.close()
+            self._redis = None
+
+    def publish(self, channel: str, message: Any):
+        """
+        Publish a reading. Safe to call from sync route handlers running in
+        the threadpool; never raises into the ingest path.
+        """
+        payload = jsonable_encoder(message)
+        try:
+            if self._redis is not None:
+                self._redis.publish(REDIS_CHANNEL_PREFIX + channel, json.dumps(payload))
+            elif self._loop is not None:
+                self._loop.call_soon_threadsafe(self._fanout, channel, payload)
+        except Exception as e:
+            logger.warning(f"Telemetry publish to {channel} failed: {e}")
+
+    def subscribe(self, channels: Iterable[str] = ()) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, settings.TELEMETRY_STREAM_QUEUE_SIZE)
+        subscription.add(channels)
+        return subscription
+
+    def _fanout(self, channel: str, payload: Dict[str, Any]):
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.offer(payload)
+
+    async def _listen_redis(self):
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + "*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"].decode()[len(REDIS_CHANNEL_PREFIX):]
+                    self._fanout(channel, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis telemetry listener error: {e}. Reconnecting in 5s...")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+
+telemetry_broker = TelemetryBroker()
+
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(request: Request, channels: Iterable[str]):
+    """Server-Sent Events generator for a set of channels"""
+    subscription = telemetry_broker.subscribe(channels)
+    try:
+        while not await request.is_disconnected():
+            message = await subscription.get(settings.TELEMETRY_STREAM_HEARTBEAT_SECONDS)
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield _sse_event("dropped", {"dropped": dropped})
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield _sse_event("telemetry", message)
+    finally:
+        subscription.close()
+
+
+async def websocket_stream(websocket: WebSocket, channel_prefix: str):
+    """
+    WebSocket session with per-connection subscriptions.
+    Clients send {"subscribe": [ids]} / {"unsubscribe": [ids]} with string
+    ids (anything else gets an "error" event); the server pushes {"event": "telemetry", "data": {...}} for every subscribed id.
+    """
+    await websocket.accept()
+    subscription = telemetry_broker.subscribe()
+
+    async def receive_commands():
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            invalid = [
+                field for field in ("subscribe", "unsubscribe")
+                if not (isinstance(command.get(field, []), list)
+                        and all(isinstance(i, str) for i in command.get(field, [])))
+            ]
+            if invalid:
+                await websocket.send_json({
+                    "event": "error",
+                    "data": {"detail": f"{', '.join(invalid)} must be a list of id strings"},
+                })
+                continue
+            subscription.add(f"{channel_prefix}:{i}" for i in command.get("subscribe", []))
+            subscription.remove(f"{channel_prefix}:{i}" for i in command.get("unsubscribe", []))
+            await websocket.send_json({
+                "event": "subscribed",
+                "data": sorted(c.split(":", 1)[1] for c in subscription.channels),
+            })
+
+    receiver = asyncio.create_task(receive_commands())
+    try:
+        while True:
+            getter = asyncio.ensure_future(subscription.get(settings.TELEMETRY_STREAM_HEARTBEAT_SECONDS))
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                receiver.result()
+                break
+            message = getter.result()
+            dropped = subscription.take_dropped()
+            if dropped:
+                await websocket.send_json({"event": "dropped", "data": {"dropped": dropped}})
+            if message is not None:
+                await websocket.send_json({"event": "telemetry", "data": message})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        subscription.close()
@@ -0,0 +1,50 @@
+"""
+Text Search
+Server-side `q=` search for list endpoints. On PostgreSQL each searchable
+column gets a pg_trgm GIN index, which serves both substring (ILIKE) and
+fuzzy (`%` similarity) matches; results are ranked by best similarity.
+Other dialects fall back to ILIKE with prefix matches ranked first.
+"""
+from typing import Sequence
+
+from sqlalchemy import case, func, or_
+
+from .database import SCHEMA_UPGRADES, DatabaseType, register_schema_upgrade
+
+TRIGRAM_EXTENSION = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+
+def register_trigram_indexes(db_type: DatabaseType, table: str, columns: Sequence[str]):
+    """Register pg_trgm GIN indexes for a table's searchable columns (run by init_db)"""
+    if TRIGRAM_EXTENSION not in SCHEMA_UPGRADES[db_type]:
+        register_schema_upgrade(db_type, TRIGRAM_EXTENSION)
+    for column in columns:
+        index_name = f"ix_{table.replace('-', '_')}_{column.lower()}_trgm"
+        register_schema_upgrade(
+            db_type,
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def apply_search(query, model, columns: Sequence, q: str):
+    """Filter `query` to rows where any column matches `q`, best matches first (newest on ties)"""
+    q = q.strip()
+    tiebreak = model.id.desc()
+    if not q:
+        return query.order_by(tiebreak)
+    pattern = _like_pattern(q)
+    substring = [column.ilike(pattern, escape="\\") for column in columns]
+
+    if query.session.get_bind().dialect.name == "postgresql":
+        fuzzy = [column.op("%")(q) for column in columns]
+        rank = func.greatest(*(func.similarity(func.coalesce(column, ""), q) for column in columns))
+        return query.filter(or_(*substring, *fuzzy)).order_by(rank.desc(), tiebreak)
+
+    prefix = _like_pattern(q)[1:]
+    rank = case((or_(*(column.ilike(prefix, escape="\\") for column in columns)), 1), else_=0)
+    return query.filter(or_(*substring)).order_by(rank.desc(), tiebreak)
@@ -0,0 +1,272 @@
+"""
+Request Coalescing (single-flight)
+Identical concurrent GETs on SINGLE_FLIGHT_PATHS share one execution: the
+first request (the leader) runs the endpoint and every request that arrives
+while it is in flight replays its response. Finished responses are reused
+for SINGLE_FLIGHT_TTL_MS. With SINGLE_FLIGHT_REDIS the leader also holds a
+short Redis lock and publishes its response, so other workers wait for it
+instead of querying the database themselves.
+
+Requests are identical when method, path, query string and the headers that
+change the response (Accept-Encoding, Authorization, If-None-Match) match.
+
+Every finished write bumps a generation for its collection (the path up to
+the last "/"); a read's generation covers each collection its path lies
+under. A request never joins, and a leader never keeps, a response whose
+generation is older than the current one, so a GET that starts after a
+write has returned never sees data read before it. With Redis the
+generations are shared counters and part of the result keys.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+import redis.asyncio as aioredis
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .metrics import COALESCED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+KEY_HEADERS = ("accept-encoding", "authorization", "if-none-match")
+SHAREABLE_STATUS = (200, 304)
+REDIS_KEY_PREFIX = "singleflight:"
+REDIS_POLL_SECONDS = 0.01
+
+# (status, headers, body)
+CapturedResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+class _Flight:
+    def __init__(self, generation: Tuple[int, ...]):
+        self.generation = generation
+        self.done = asyncio.Event()
+        self.response: Optional[CapturedResponse] = None  # None when the leader's response can't be shared
+
+
+def _collection(path: str) -> str:
+    """/api/v1/clients/5 -> /api/v1/clients/; collection paths map to themselves"""
+    return path if path.endswith("/") else path.rsplit("/", 1)[0] + "/"
+
+
+def _collections(path: str) -> List[str]:
+    """Every collection a read of path lies under: /api/v1/clients/5 -> /, /api/, /api/v1/, /api/v1/clients/"""
+    return [path[:i + 1] for i, char in enumerate(path) if char == "/"]
+
+
+async def _replay(send: Send, response: CapturedResponse):
+    status, headers, body = response
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class SingleFlightMiddleware:
+    """Collapse identical concurrent GETs into one endpoint execution"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.patterns = [settings.API_V1_STR + pattern for pattern in settings.SINGLE_FLIGHT_PATHS]
+        self.ttl = settings.SINGLE_FLIGHT_TTL_MS / 1000
+        self._inflight: Dict[str, _Flight] = {}
+        self._recent: Dict[str, Tuple[float, str, Tuple[int, ...], CapturedResponse]] = {}  # key -> (expires, path, generation, response)
+        self._generations: Dict[str, int] = {}  # collection -> finished writes
+        self._redis: Optional[aioredis.Redis] = None
+        if settings.SINGLE_FLIGHT_REDIS and settings.REDIS_URL and self.ttl > 0:
+            self._redis = aioredis.Redis.from_url(settings.REDIS_URL)
+
+    def _key(self, scope: Scope) -> str:
+        headers = Headers(scope=scope)
+        parts = [scope["path"], scope.get("query_string", b"").decode("latin-1")]
+        parts.extend(headers.get(name, "") for name in KEY_HEADERS)
+        return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+    def _generation(self, path: str) -> Tuple[int, ...]:
+        return tuple(self._generations.get(collection, 0) for collection in _collections(path))
+
+    async def _write_finished(self, path: str):
+        prefix = _collection(path)
+        if not self._inflight and not self._recent:
+            self._generations.clear()  # Nothing recorded a generation, so the counters can restart
+        self._generations[prefix] = self._generations.get(prefix, 0) + 1
+        for key in [key for key, (_, cached_path, _, _) in self._recent.items() if cached_path.startswith(prefix)]:
+            self._recent.pop(key, None)
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.incr(REDIS_KEY_PREFIX + "gen:" + prefix)
+                    # Outlives every result published under the old value
+                    pipe.pexpire(REDIS_KEY_PREFIX + "gen:" + prefix,
+                                 settings.SINGLE_FLIGHT_LOCK_MS + settings.SINGLE_FLIGHT_TTL_MS + 1000)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Single-flight Redis generation bump failed: {e}")
+
+    def _remember(self, key: str, path: str, generation: Tuple[int, ...], response: CapturedResponse):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        for stale in [k for k, (expires, _, _, _) in self._recent.items() if expires <= now]:
+            self._recent.pop(stale, None)
+        self._recent[key] = (now + self.ttl, path, generation, response)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] != "GET":
+            if scope["method"] not in ("POST", "PUT", "PATCH", "DELETE"):
+                await self.app(scope, receive, send)
+                return
+            finished = False
+
+            async def send_wrapper(message: Message):
+                nonlocal finished
+                if message["type"] == "http.response.start" and not finished:
+                    finished = True  # Before the client can see the write and issue its next GET
+                    await self._write_finished(scope["path"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if not finished:
+                    await self._write_finished(scope["path"])
+            return
+        if not any(fnmatchcase(scope["path"], pattern) for pattern in self.patterns):
+            await self.app(scope, receive, send)
+            return
+
+        key = self._key(scope)
+        generation = self._generation(scope["path"])
+        cached = self._recent.get(key)
+        if cached and cached[0] > time.monotonic() and cached[2] == generation:
+            COALESCED_REQUESTS.labels("cached").inc()
+            await _replay(send, cached[3])
+            return
+
+        flight = self._inflight.get(key)
+        if flight is not None and flight.generation == generation:
+            await flight.done.wait()
+            if flight.response is not None:
+                COALESCED_REQUESTS.labels("shared").inc()
+                await _replay(send, flight.response)
+            else:
+                await self.app(scope, receive, send)
+            return
+
+        # A stale flight stays with the requests that joined it; new ones follow this leader
+        flight = self._inflight[key] = _Flight(generation)
+        remote_key = None
+        locked = False
+        try:
+            if self._redis is not None:
+                remote_key = await self._remote_key(scope["path"], key)
+            if remote_key is not None:
+                shared, locked = await self._await_other_worker(remote_key)
+                if shared is not None:
+                    COALESCED_REQUESTS.labels("shared_remote").inc()
+                    flight.response = shared
+                    await _replay(send, shared)
+                    return
+            flight.response = await self._lead(scope, receive, send)
+            if flight.response is not None and self._generation(scope["path"]) == generation:
+                self._remember(key, scope["path"], generation, flight.response)
+                if locked:
+                    await self._publish(remote_key, flight.response)
+        finally:
+            flight.done.set()
+            if self._inflight.get(key) is flight:
+                self._inflight.pop(key)
+            if locked:
+                await self._release(remote_key)
+
+    async def _lead(self, scope: Scope, receive: Receive, send: Send) -> Optional[CapturedResponse]:
+        """Run the endpoint, streaming to the client while capturing a shareable copy"""
+        status = 0
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        shareable = True
+
+        async def send_wrapper(message: Message):
+            nonlocal status, headers, size, shareable
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                shareable = status in SHAREABLE_STATUS
+            elif message["type"] == "http.response.body" and shareable:
+                body = message.get("body", b"")
+                size += len(body)
+                if message.get("more_body", False) or size > settings.SINGLE_FLIGHT_MAX_BYTES:
+                    shareable = False  # Streams and oversized bodies are not held in memory
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        COALESCED_REQUESTS.labels("leader").inc()
+        return (status, headers, b"".join(chunks)) if shareable and status else None
+
+    async def _remote_key(self, path: str, key: str) -> Optional[str]:
+        """Scope a request key by the shared write generations of its collections; None runs locally"""
+        try:
+            generations = await self._redis.mget([REDIS_KEY_PREFIX + "gen:" + c for c in _collections(path)])
+        except Exception as e:
+            logger.warning(f"Single-flight Redis coordination failed, running locally: {e}")
+            return None
+        return ".".join((g or b"0").decode() for g in generations) + ":" + key
+
+    async def _await_other_worker(self, key: str) -> Tuple[Optional[CapturedResponse], bool]:
+        """
+        Take the cross-worker lock, or wait for the worker holding it to publish
+        its response. Returns (shared response, whether this worker holds the lock);
+        with no shared response this worker runs the request itself.
+        """
+        result_key = REDIS_KEY_PREFIX + "result:" + key
+        lock_key = REDIS_KEY_PREFIX + "lock:" + key
+        try:
+            cached = await self._redis.get(result_key)
+            if cached is not None:
+                return self._decode(cached), False
+            if await self._redis.set(lock_key, 1, nx=True, px=settings.SINGLE_FLIGHT_LOCK_MS):
+                return None, True
+            deadline = time.monotonic() + settings.SINGLE_FLIGHT_LOCK_MS / 1000
+            while time.monotonic() < deadline:
+                await asyncio.sleep(REDIS_POLL_SECONDS)
+                cached = await self._redis.get(result_key)
+                if cached is not None:
+                    return self._decode(cached), False
+                if not await self._redis.exists(lock_key):
+                    break  # Leader finished without a shareable response
+        except Exception as e:
+            logger.warning(f"Single-flight Redis coordination failed, running locally: {e}")
+        return None, False
+
+    async def _publish(self, key: str, response: CapturedResponse):
+        status, headers, body = response
+        try:
+            await self._redis.set(
+                REDIS_KEY_PREFIX + "result:" + key,
+                msgpack.packb([status, [list(h) for h in headers], body]),
+                px=settings.SINGLE_FLIGHT_TTL_MS,
+            )
+        except Exception as e:
+            logger.warning(f"Single-flight Redis publish failed: {e}")
+
+    async def _release(self, key: str):
+        try:
+            await self._redis.delete(REDIS_KEY_PREFIX + "lock:" + key)
+        except Exception as e:
+            logger.warning(f"Single-flight Redis unlock failed: {e}")
+
+    @staticmethod
+    def _decode(raw: bytes) -> CapturedResponse:
+        status, headers, body = msgpack.unpackb(raw)
+        return status, [tuple(h) for h in headers], body
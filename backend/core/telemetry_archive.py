@@ -0,0 +1,223 @@
+"""
+Telemetry Archive
+Append-only, compressed segment files for telemetry that has aged out of the
+hot Postgres tables (see scripts/archive_telemetry.py).
+
+Layout, one pair of files per device per day:
+    {TELEMETRY_ARCHIVE_DIR}/{kind}/{device_id}/{YYYY-MM-DD}.seg
+    {TELEMETRY_ARCHIVE_DIR}/{kind}/{device_id}/{YYYY-MM-DD}.idx
+
+Each archive run appends one compressed NDJSON block to the .seg file and one
+JSON line to the .idx describing it (offset, length, codec, count, id range).
+Readers memory-map the .seg file and decompress only the blocks they need.
+"""
+import gzip
+import json
+import logging
+import mmap
+import os
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import orjson
+import zstandard
+
+from .config import settings
+from .telemetry_filter import document_contains
+
+logger = logging.getLogger(__name__)
+
+# Blocks per day file before the archive job rewrites them as a single block
+COMPACT_THRESHOLD = 8
+
+CODECS = {
+    "gzip": (gzip.compress, gzip.decompress),
+    "zstd": (
+        lambda raw: zstandard.ZstdCompressor(level=10).compress(raw),
+        lambda blob: zstandard.ZstdDecompressor().decompress(blob),
+    ),
+}
+
+DEFAULT_POLICY = "default"
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+def get_retention_days(application_name: Optional[str] = None) -> int:
+    """Retention for an application (falls back to default); 0 means never archive"""
+    policies = settings.TELEMETRY_RETENTION_DAYS
+    if application_name and application_name in policies:
+        return policies[application_name]
+    return policies.get(DEFAULT_POLICY, 0)
+
+
+def device_dir(kind: str, device_id: str) -> Optional[str]:
+    """Archive directory for a device, or None if the id is not a safe path component"""
+    if not isinstance(device_id, str) or not _SAFE_NAME.match(device_id):
+        return None
+    return os.path.join(settings.TELEMETRY_ARCHIVE_DIR, kind, device_id)
+
+
+def _paths(kind: str, device_id: str, day: date):
+    directory = device_dir(kind, device_id)
+    if directory is None:
+        raise ValueError(f"Unsafe device id for archive path: {device_id!r}")
+    base = os.path.join(directory, day.isoformat())
+    return base + ".seg", base + ".idx"
+
+
+def read_index(idx_path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(idx_path):
+        return []
+    with open(idx_path, "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def list_days(kind: str, device_id: str) -> List[date]:
+    """Archived days for a device, oldest first"""
+    directory = device_dir(kind, device_id)
+    if directory is None or not os.path.isdir(directory):
+        return []
+    return sorted(
+        date.fromisoformat(name[:-4]) for name in os.listdir(directory) if name.endswith(".idx")
+    )
+
+
+def archived_max_id(kind: str, device_id: str, day: date) -> int:
+    """Highest row id already archived for a day; rows at or below it are duplicates"""
+    if device_dir(kind, device_id) is None:
+        return 0  # Such a device can never have been archived
+    _, idx_path = _paths(kind, device_id, day)
+    return max((entry["max_id"] for entry in read_index(idx_path)), default=0)
+
+
+def append_block(kind: str, device_id: str, day: date, rows: List[Dict[str, Any]]) -> int:
+    """
+    Append rows (dicts with id/data/timestamp and the device id field) as one
+    compressed block. The .seg write is fsynced before the .idx line is added,
+    so a crash can leave unreferenced bytes but never a dangling index entry.
+    """
+    if not rows:
+        return 0
+    directory = device_dir(kind, device_id)
+    if directory is None:
+        raise ValueError(f"Unsafe device id for archive path: {device_id!r}")
+    os.makedirs(directory, exist_ok=True)
+    seg_path, idx_path = _paths(kind, device_id, day)
+
+    codec = settings.TELEMETRY_ARCHIVE_CODEC
+    compress, _ = CODECS[codec]
+    blob = compress(b"\n".join(orjson.dumps(row) for row in rows))
+
+    with open(seg_path, "ab") as seg:
+        offset = seg.tell()
+        seg.write(blob)
+        seg.flush()
+        os.fsync(seg.fileno())
+
+    entry = {
+        "offset": offset,
+        "length": len(blob),
+        "codec": codec,
+        "count": len(rows),
+        "min_id": min(row["id"] for row in rows),
+        "max_id": max(row["id"] for row in rows),
+    }
+    with open(idx_path, "ab") as idx:
+        idx.write(json.dumps(entry).encode() + b"\n")
+        idx.flush()
+        os.fsync(idx.fileno())
+    return len(rows)
+
+
+def _decode_blocks(seg_path: str, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows = []
+    if not entries:
+        return rows
+    with open(seg_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+        for entry in entries:
+            _, decompress = CODECS[entry["codec"]]
+            raw = decompress(segment[entry["offset"]:entry["offset"] + entry["length"]])
+            rows.extend(orjson.loads(line) for line in raw.split(b"\n") if line)
+    return rows
+
+
+def read_day(kind: str, device_id: str, day: date) -> List[Dict[str, Any]]:
+    """All archived rows for one device-day, newest first"""
+    seg_path, idx_path = _paths(kind, device_id, day)
+    try:
+        rows = _decode_blocks(seg_path, read_index(idx_path))
+    except Exception:
+        # compact_day swaps .seg and .idx with two renames; re-read once if we raced it
+        rows = _decode_blocks(seg_path, read_index(idx_path))
+    rows.sort(key=lambda row: (row["timestamp"], row["id"]), reverse=True)
+    return rows
+
+
+def read_archive(
+    kind: str,
+    device_id: str,
+    skip: int,
+    limit: int,
+    document: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Page through archived rows newest first, continuing where the hot table ends.
+    Without a filter, whole days are skipped using the index counts alone.
+    """
+    results: List[Dict[str, Any]] = []
+    if limit <= 0:
+        return results
+
+    for day in reversed(list_days(kind, device_id)):
+        if document is None:
+            _, idx_path = _paths(kind, device_id, day)
+            count = sum(entry["count"] for entry in read_index(idx_path))
+            if skip >= count:
+                skip -= count
+                continue
+
+        rows = read_day(kind, device_id, day)
+        if document is not None:
+            rows = [row for row in rows if document_contains(row["data"], document)]
+        if skip >= len(rows):
+            skip -= len(rows)
+            continue
+
+        results.extend(rows[skip:skip + limit - len(results)])
+        skip = 0
+        if len(results) >= limit:
+            break
+    return results
+
+
+def compact_day(kind: str, device_id: str, day: date) -> bool:
+    """Rewrite a day file with many small blocks as a single block"""
+    seg_path, idx_path = _paths(kind, device_id, day)
+    entries = read_index(idx_path)
+    if len(entries) < COMPACT_THRESHOLD:
+        return False
+
+    rows = sorted(_decode_blocks(seg_path, entries), key=lambda row: (row["timestamp"], row["id"]))
+    codec = settings.TELEMETRY_ARCHIVE_CODEC
+    compress, _ = CODECS[codec]
+    blob = compress(b"\n".join(orjson.dumps(row) for row in rows))
+    entry = {
+        "offset": 0,
+        "length": len(blob),
+        "codec": codec,
+        "count": len(rows),
+        "min_id": min(row["id"] for row in rows),
+        "max_id": max(row["id"] for row in rows),
+    }
+
+    for path, content in ((seg_path, blob), (idx_path, json.dumps(entry).encode() + b"\n")):
+        with open(path + ".tmp", "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(seg_path + ".tmp", seg_path)
+    os.replace(idx_path + ".tmp", idx_path)
+    logger.info(f"Compacted {kind}/{device_id}/{day}: {len(entries)} blocks -> 1")
+    return True
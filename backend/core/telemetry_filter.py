@@ -0,0 +1,111 @@
+"""
+Telemetry Filtering
+Turns the telemetry GET `where` parameter into a JSONB containment (@>) clause
+that PostgreSQL answers from the jsonb_path_ops GIN index on `data`.
+"""
+import json
+from typing import Any, Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, bindparam, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+def _parse_value(raw: str) -> Any:
+    """Read `5`, `true`, `null`, `"x"` as JSON; anything else is a plain string"""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def parse_where(where: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a `where` filter into a containment document.
+
+    Accepts either a JSON object (`{"status": "alarm"}`) or comma-separated
+    `key:value` pairs (`status:alarm,code:5`). Dotted keys nest, so
+    `gw.status:error` becomes `{"gw": {"status": "error"}}`.
+    """
+    if not where:
+        return None
+
+    where = where.strip()
+    if where.startswith("{"):
+        try:
+            document = json.loads(where)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid 'where' filter: malformed JSON"
+            )
+        if not isinstance(document, dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid 'where' filter: JSON filter must be an object"
+            )
+        return document
+
+    document: Dict[str, Any] = {}
+    for pair in where.split(","):
+        key, sep, raw_value = pair.partition(":")
+        key = key.strip()
+        if not sep or not key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid 'where' filter term '{pair}', expected key:value"
+            )
+        node = document
+        *parents, leaf = key.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+            if not isinstance(node, dict):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid 'where' filter: conflicting key '{key}'"
+                )
+        node[leaf] = _parse_value(raw_value.strip())
+    return document
+
+
+def document_contains(value: Any, document: Any) -> bool:
+    """Python equivalent of JSONB `value @> document`, used for archived rows"""
+    if isinstance(document, dict):
+        return isinstance(value, dict) and all(
+            key in value and document_contains(value[key], item) for key, item in document.items()
+        )
+    if isinstance(document, list):
+        return isinstance(value, list) and all(
+            any(document_contains(candidate, item) for candidate in value) for item in document
+        )
+    if isinstance(value, bool) or isinstance(document, bool):
+        return value is document
+    return value == document
+
+
+def _scalar_paths(document: Dict[str, Any], prefix: str = "$"):
+    for key, value in document.items():
+        path = f'{prefix}."{key}"'
+        if isinstance(value, dict):
+            yield from _scalar_paths(value, path)
+        else:
+            yield path, value
+
+
+def containment_clause(column, document: Dict[str, Any], dialect_name: str):
+    """
+    Build `column @> document`. PostgreSQL uses the GIN index; other dialects
+    (SQLite stand-ins) fall back to per-key json_extract equality on scalars.
+    """
+    if dialect_name == "postgresql":
+        return column.op("@>")(bindparam(None, document, type_=JSONB))
+
+    clauses = []
+    for path, value in _scalar_paths(document):
+        if isinstance(value, (list, dict)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Array containment filters require PostgreSQL"
+            )
+        extracted = func.json_extract(column, path)
+        clauses.append(extracted.is_(None) if value is None else extracted == value)
+    return and_(*clauses)
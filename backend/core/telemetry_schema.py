@@ -0,0 +1,32 @@
+"""
+Telemetry Schema Registry
+Per-application list of "hot" telemetry keys that are promoted from the JSON
+payload into typed numeric metric rows on ingest.
+"""
+from typing import Any, Dict, List, Optional
+from .config import settings
+
+DEFAULT_APPLICATION = "default"
+
+
+def get_hot_keys(application_name: Optional[str] = None) -> List[str]:
+    """Return the hot keys configured for an application (falls back to default)"""
+    registry = settings.TELEMETRY_HOT_KEYS
+    if application_name and application_name in registry:
+        return registry[application_name]
+    return registry.get(DEFAULT_APPLICATION, [])
+
+
+def extract_hot_metrics(data: Dict[str, Any], application_name: Optional[str] = None) -> Dict[str, float]:
+    """
+    Pick the registered hot keys out of a telemetry payload.
+    Only numeric values are promoted; anything else stays JSON-only.
+    """
+    metrics = {}
+    for key in get_hot_keys(application_name):
+        value = data.get(key)
+        # bool is an int subclass but is not a measurement
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        metrics[key] = float(value)
+    return metrics
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration
+Prepares the shared Prometheus multiprocess directory so /metrics aggregates
+every worker (see core/metrics.py), and exports the worker count.
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    """Start each master run with an empty metrics directory"""
+    # Workers inherit this; per-process state such as in-memory liveness checks it (core/liveness.py)
+    os.environ["GUNICORN_WORKERS"] = str(server.cfg.workers)
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges of workers that have exited"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,6 +2,7 @@
 Southern IOT System - Main Application Entry Point
 Modular FastAPI Backend
 """
+import logging
 import traceback
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,6 +10,15 @@ from fastapi.responses import JSONResponse
 
 from core import settings, init_db, setup_logging
 from core.database import SessionLocalUsers, SessionLocalUsersImplementation
+from core.pubsub import telemetry_broker
+from core.liveness import liveness_monitor
+from core.metrics import PrometheusMiddleware
+from core.db_diagnostics import DBDiagnosticsMiddleware
+from core.profiler import ProfileRequestMiddleware, install_signal_handler
+from core.compression import CompressionMiddleware
+from core.singleflight import SingleFlightMiddleware
+from core.admission import AdmissionControlMiddleware
+from core.deadlines import DeadlineExceeded, DeadlineMiddleware, is_query_cancelled
 
 
 # Import routers from modules (Importing here ensures models are registered before init_db)
@@ -25,10 +35,12 @@ from modules.end_device.models.telemetry import Telemetry
 from modules.gateway import gateway_router
 from modules.gateway.models.telemetry import GatewayTelemetry
 
-from modules.health import health_router
+from modules.dashboard import dashboard_router
+from modules.health import health_router, metrics_router, profiling_router
 
-# Configure logging
-logger = setup_logging()
+# Configure logging once for the process; modules log via logging.getLogger(__name__)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -36,7 +48,33 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# zstd/br/gzip for large JSON; the OpenAPI document is compressed once and served from memory
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, cached_paths=[app.openapi_url])
+
+# Shed load with 503 + Retry-After instead of queueing behind a slow database
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Identical concurrent reads share one execution (single-flight with a micro-TTL)
+if settings.SINGLE_FLIGHT_ENABLED:
+    app.add_middleware(SingleFlightMiddleware)
+
+# Per-route-class DB time budget (statement_timeout), X-Request-Timeout-Ms, cancel on disconnect
+app.add_middleware(DeadlineMiddleware)
+
+# Per-route request metrics, exposed at /metrics
+app.add_middleware(PrometheusMiddleware)
+
+# Per-request SQL accounting and Server-Timing header (DB_DIAGNOSTICS_ENABLED)
+if settings.DB_DIAGNOSTICS_ENABLED:
+    app.add_middleware(DBDiagnosticsMiddleware)
+
+# Opt-in per-request sampling (X-Profile header + X-Admin-Token)
+app.add_middleware(ProfileRequestMiddleware)
+
 # Set up CORS - Allow all origins for internal ERP
+# Added last so it is outermost: shed (503), coalesced and cached responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -45,9 +83,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
 # Global exception handler for unhandled exceptions
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
+    if is_query_cancelled(exc):
+        logger.warning(f"Query cancelled (statement timeout or client disconnect): {request.method} {request.url.path}")
+        return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
     logger.error(
         f"Unhandled exception: {type(exc).__name__}: {str(exc)}\n"
         f"Request: {request.method} {request.url}\n"
@@ -80,6 +125,17 @@ async def startup_event():
         db.close()
         db_implement.close()
 
+    await telemetry_broker.start()
+    await liveness_monitor.start()
+
+    # `kill -USR2 <worker pid>` writes a profile of that worker to PROFILER_OUTPUT_DIR
+    install_signal_handler()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await telemetry_broker.stop()
+    await liveness_monitor.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -99,4 +155,8 @@ app.include_router(users_implementation_router, prefix=f"{settings.API_V1_STR}/u
 app.include_router(end_device_router, prefix=f"{settings.API_V1_STR}/end_device", tags=["end_device"])
 app.include_router(gateway_router, prefix=f"{settings.API_V1_STR}/gateway", tags=["gateway"])
 
+app.include_router(dashboard_router, prefix=f"{settings.API_V1_STR}/dashboard", tags=["dashboard"])
+
 app.include_router(health_router, prefix=f"{settings.API_V1_STR}", tags=["health"])
+app.include_router(metrics_router, tags=["health"])
+app.include_router(profiling_router, prefix=f"{settings.API_V1_STR}", tags=["admin"])
@@ -1,15 +1,16 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 from sqlalchemy.orm import Session
 from core.database import get_db_users
 from core import get_password_hash, verify_password, create_access_token
 from core.security import decode_token
-from core.logging import setup_logging
+from core.deadlines import reraise_deadline_errors
 from modules.users.models.user import User
 from modules.users.schemas.user import UserCreate, UserResponse, Token, LoginRequest
 from datetime import timedelta
 from typing import Optional
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -51,6 +52,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db_users)):
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Registration error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
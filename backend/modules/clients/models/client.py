@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
-from core.database import BaseClients as Base
+from core.database import BaseClients as Base, DatabaseType
+from core.search import register_trigram_indexes
 
 class Client(Base):
     __tablename__ = "clients"
@@ -14,3 +15,6 @@ class Client(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Trigram indexes behind the `q=` list search
+register_trigram_indexes(DatabaseType.CLIENTS, "clients", ["client_name", "email", "phone"])
@@ -1,35 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from core.config import settings
 from core.database import get_db_clients
-from core.logging import setup_logging
+from core.bulk import (
+    BulkDelete, BulkLookup, BulkResult, LookupResult, allocate_ids, bulk_delete, bulk_insert, bulk_update,
+    check_batch_size, created_result, deleted_result, lookup_many, parse_ids, updated_result,
+    yearly_prefix,
+)
+from core.conditional import conditional_item, conditional_list
+from core.projection import Projection
+from core.search import apply_search
+from core.deadlines import reraise_deadline_errors
 from modules.clients.models.client import Client
-from modules.clients.schemas.client import ClientCreate, Client as ClientSchema, ClientUpdate
+from modules.clients.schemas.client import ClientCreate, Client as ClientSchema, ClientUpdate, ClientBulkUpdate
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 def generate_client_id(db: Session):
     """Generate CLI-YYYY-0001 format ID"""
-    year = datetime.now().year
-    prefix = f"CLI-{year}-"
-    
-    # Find highest existing ID for this year
-    last_client = db.query(Client).filter(Client.client_ID.like(f"{prefix}%")).order_by(Client.client_ID.desc()).first()
-    
-    if last_client:
-        try:
-            last_number = int(last_client.client_ID.split("-")[-1])
-            new_number = last_number + 1
-        except:
-            new_number = 1
-    else:
-        new_number = 1
-        
-    return f"{prefix}{new_number:04d}"
+    return allocate_ids(db, Client.client_ID, yearly_prefix("CLI"), 1)[0]
 
 @router.post("/", response_model=ClientSchema, status_code=status.HTTP_201_CREATED)
 def create_client(client_data: ClientCreate, db: Session = Depends(get_db_clients)):
@@ -52,24 +46,123 @@ def create_client(client_data: ClientCreate, db: Session = Depends(get_db_client
         return new_client
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Client creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create client: {str(e)}"
         )
 
+# Bulk endpoints are registered before the /{id} routes so "bulk" is not read as an ID
+
+@router.post("/bulk", response_model=BulkResult[ClientSchema], status_code=status.HTTP_201_CREATED)
+def create_clients_bulk(items: List[ClientCreate], db: Session = Depends(get_db_clients)):
+    """Create many clients in one transaction; IDs are allocated in one step"""
+    check_batch_size(len(items))
+    try:
+        ids = allocate_ids(db, Client.client_ID, yearly_prefix("CLI"), len(items))
+        created = bulk_insert(db, Client, [
+            {**item.model_dump(), "client_ID": new_id} for item, new_id in zip(items, ids)
+        ])
+        db.commit()
+        return created_result(created)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk client creation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create clients: {str(e)}"
+        )
+
+@router.patch("/bulk", response_model=BulkResult[ClientSchema])
+def update_clients_bulk(items: List[ClientBulkUpdate], db: Session = Depends(get_db_clients)):
+    """Partially update many clients by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(items))
+    try:
+        changes = [item.model_dump(exclude_unset=True) for item in items]
+        refreshed, _ = bulk_update(db, Client, changes)
+        db.commit()
+        return updated_result(changes, refreshed)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk client update error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update clients: {str(e)}"
+        )
+
+@router.delete("/bulk", response_model=BulkResult[ClientSchema])
+def delete_clients_bulk(request: BulkDelete, db: Session = Depends(get_db_clients)):
+    """Delete many clients by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(request.ids))
+    try:
+        deleted = bulk_delete(db, Client, request.ids)
+        db.commit()
+        return deleted_result(request.ids, deleted)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk client deletion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete clients"
+        )
+
+@router.post("/lookup", response_model=LookupResult[ClientSchema])
+def lookup_clients(request: BulkLookup, db: Session = Depends(get_db_clients)):
+    """Fetch many clients by internal or public ID in one query; unknown IDs are listed in `missing`"""
+    items, missing = lookup_many(db, Client, Client.client_ID, request.ids)
+    return {"items": items, "missing": missing}
+
+CLIENT_SEARCH_COLUMNS = (Client.client_name, Client.email, Client.phone)
+
+CLIENT_FIELDS = Projection(ClientSchema, Client, {
+    "summary": ["client_ID", "client_name"],
+    "contact": ["client_ID", "client_name", "email", "phone"],
+})
+
 @router.get("/", response_model=List[ClientSchema])
-def get_clients(skip: int = 0, limit: int = 10000, db: Session = Depends(get_db_clients)):
-    """Get all clients"""
-    clients = db.query(Client).order_by(Client.id.desc()).offset(skip).limit(limit).all()
+def get_clients(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10000,
+    ids: Optional[str] = Query(None, description="Comma-separated internal or public IDs (CLI-YYYY-NNNN)"),
+    q: Optional[str] = Query(None, min_length=1, description="Search client name, email or phone; results ranked by match quality"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    view: Optional[str] = Query(None, description="Named fieldset: summary, contact"),
+    db: Session = Depends(get_db_clients)
+):
+    """Get all clients; `ids` fetches a specific set in one query, `q` searches, `fields`/`view` trim the columns"""
+    fieldset = CLIENT_FIELDS.resolve(fields, view)
+    not_modified = conditional_list(request, response, db, Client, max_age=settings.REFERENCE_DATA_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+    if ids:
+        items, _ = lookup_many(db, Client, Client.client_ID, parse_ids(ids))
+        return CLIENT_FIELDS.respond(items, fieldset, response.headers) if fieldset else items
+    query = db.query(Client)
+    if q:
+        query = apply_search(query, Client, CLIENT_SEARCH_COLUMNS, q)
+    else:
+        query = query.order_by(Client.id.desc())
+    query = query.offset(skip).limit(limit)
+    if fieldset:
+        return CLIENT_FIELDS.respond(CLIENT_FIELDS.select(query, fieldset).all(), fieldset, response.headers)
+    clients = query.all()
     return clients
 
 @router.get("/{id}", response_model=ClientSchema)
-def get_client(id: int, db: Session = Depends(get_db_clients)):
+def get_client(id: int, request: Request, response: Response, db: Session = Depends(get_db_clients)):
     """Get a specific client by internal ID"""
     client = db.query(Client).filter(Client.id == id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
+    not_modified = conditional_item(request, response, client, max_age=settings.REFERENCE_DATA_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
     return client
 
 @router.put("/{id}", response_model=ClientSchema)
@@ -89,6 +182,7 @@ def update_client(id: int, client_data: ClientUpdate, db: Session = Depends(get_
         return client
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Client update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -108,6 +202,7 @@ def delete_client(id: int, db: Session = Depends(get_db_clients)):
         return None
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Client deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
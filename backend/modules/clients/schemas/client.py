@@ -17,6 +17,9 @@ class ClientUpdate(BaseModel):
     phone: Optional[str] = None
     address: Optional[str] = None
 
+class ClientBulkUpdate(ClientUpdate):
+    id: int  # Internal ID of the client to update
+
 class Client(ClientBase):
     id: int
     client_ID: str # Included in response
@@ -0,0 +1,2 @@
+"""Dashboard module - Cross-database summary for the landing pages"""
+from .routes.dashboard import router as dashboard_router
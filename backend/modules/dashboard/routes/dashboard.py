@@ -0,0 +1,96 @@
+"""
+Dashboard Summary Endpoint
+Counts and most recent items from every database in one request. Each
+database is queried in its own thread, so the response takes about as long
+as the slowest source; a source that fails or exceeds its timeout is
+reported as missing instead of failing the whole summary.
+"""
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Response
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from core.config import settings
+from core.database import (
+    DatabaseType, SessionLocalClients, SessionLocalEndDevice, SessionLocalGateway, SessionLocalOrders,
+    SessionLocalUsers, SessionLocalUsersImplementation,
+)
+from core.fanout import AsyncTTLCache, run_concurrently
+from modules.clients.models.client import Client
+from modules.end_device.models.end_device import End_device
+from modules.gateway.models.gateway import Gateway
+from modules.orders.models.order import OrderManagement
+from modules.users.models.user import User
+from modules.users_implementation.models.user_implementation import User as UserImplementation
+from modules.dashboard.schemas.dashboard import DashboardSummary, RecentItem, SourceSummary
+
+router = APIRouter()
+
+# Home pages load together; share one round of queries between them
+summary_cache = AsyncTTLCache(ttl=settings.DASHBOARD_CACHE_SECONDS)
+
+# source -> (session factory, model, public ID column, name column)
+SOURCES = {
+    DatabaseType.CLIENTS: (SessionLocalClients, Client, Client.client_ID, Client.client_name),
+    DatabaseType.ORDERS: (SessionLocalOrders, OrderManagement, OrderManagement.order_id, OrderManagement.order_name),
+    DatabaseType.END_DEVICE: (SessionLocalEndDevice, End_device, End_device.end_device_ID, End_device.end_device_name),
+    DatabaseType.GATEWAY: (SessionLocalGateway, Gateway, Gateway.gateway_ID, Gateway.gateway_name),
+    DatabaseType.USERS: (SessionLocalUsers, User, User.username, User.full_name),
+    DatabaseType.USERS_IMPLEMENTATION: (
+        SessionLocalUsersImplementation, UserImplementation, UserImplementation.username, UserImplementation.full_name,
+    ),
+}
+
+
+def _summarize(session_factory: sessionmaker, model, public_id, name):
+    def summarize() -> dict:
+        db: Session = session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                # Stop the queries server-side too once the caller has given up on this source
+                timeout_ms = int(settings.DASHBOARD_SOURCE_TIMEOUT_SECONDS * 1000)
+                db.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+            total = db.query(func.count(model.id)).scalar()
+            rows = db.query(model.id, public_id, name, model.created_at)\
+                .order_by(model.id.desc()).limit(settings.DASHBOARD_RECENT_ITEMS).all()
+            return {
+                "total": total,
+                "recent": [
+                    RecentItem(id=row[0], public_id=row[1], name=row[2], created_at=row[3]) for row in rows
+                ],
+            }
+        finally:
+            db.close()
+    return summarize
+
+
+async def build_summary() -> DashboardSummary:
+    results = await run_concurrently(
+        {db_type.value: _summarize(*source) for db_type, source in SOURCES.items()},
+        timeout=settings.DASHBOARD_SOURCE_TIMEOUT_SECONDS,
+    )
+    sources = {}
+    for name, result in results.items():
+        if result["ok"]:
+            sources[name] = SourceSummary(ok=True, elapsed_ms=result["elapsed_ms"], **result["value"])
+        else:
+            sources[name] = SourceSummary(ok=False, elapsed_ms=result["elapsed_ms"], error=result["error"])
+    return DashboardSummary(
+        generated_at=datetime.now(timezone.utc),
+        partial=not all(source.ok for source in sources.values()),
+        sources=sources,
+    )
+
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(response: Response):
+    """
+    Totals and the latest DASHBOARD_RECENT_ITEMS records for clients, orders, end devices,
+    gateways and both user databases, queried concurrently (cached DASHBOARD_CACHE_SECONDS).
+    Sources that fail or exceed DASHBOARD_SOURCE_TIMEOUT_SECONDS come back with ok=false
+    and `partial` is set; the rest of the summary is still returned.
+    """
+    summary = await summary_cache.get_or_compute("summary", build_summary)
+    response.headers["Cache-Control"] = f"private, max-age={int(settings.DASHBOARD_CACHE_SECONDS)}"
+    return summary
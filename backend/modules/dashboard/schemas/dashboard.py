@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class RecentItem(BaseModel):
+    id: int
+    public_id: Optional[str] = None  # client_ID, order_id, end_device_ID, gateway_ID or username
+    name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class SourceSummary(BaseModel):
+    ok: bool
+    total: Optional[int] = None
+    recent: List[RecentItem] = []
+    elapsed_ms: float
+    error: Optional[str] = None  # Set when the source failed or timed out
+
+
+class DashboardSummary(BaseModel):
+    generated_at: datetime
+    partial: bool  # At least one source is missing; the others are still reported
+    sources: Dict[str, SourceSummary]
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
-from core.database import BaseEndDevice as Base
+from core.database import BaseEndDevice as Base, DatabaseType
+from core.search import register_trigram_indexes
 
 class End_device(Base):
     __tablename__ = "end-device"
@@ -14,3 +15,6 @@ class End_device(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Trigram indexes behind the `q=` list search
+register_trigram_indexes(DatabaseType.END_DEVICE, "end-device", ["end_device_name", "address"])
@@ -1,11 +1,53 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from core.database import BaseEndDevice as Base
+from core.database import BaseEndDevice as Base, DatabaseType, register_schema_upgrade
 
 class Telemetry(Base):
     __tablename__ = "telemetry"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     end_device_id = Column(String, index=True) # Matches End_device.end_device_ID
-    data = Column(JSON, nullable=False)
+    data = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    metrics = relationship("TelemetryMetric", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # jsonb_path_ops GIN index answers data @> '{...}' containment filters
+        Index("ix_telemetry_data_gin", "data", postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"}),
+    )
+
+class TelemetryMetric(Base):
+    """Hot telemetry keys extracted into typed columns (see core.telemetry_schema)"""
+    __tablename__ = "telemetry_metric"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    telemetry_id = Column(Integer, ForeignKey("telemetry.id", ondelete="CASCADE"), nullable=False, index=True)
+    end_device_id = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    value = Column(Float, nullable=False)
+    # now() is the transaction timestamp, so this matches the parent Telemetry row
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_telemetry_metric_device_key_ts", "end_device_id", "key", "timestamp"),
+    )
+
+# Existing deployments created "telemetry.data" as JSON; convert it in place and add the GIN index
+register_schema_upgrade(DatabaseType.END_DEVICE, """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'telemetry' AND column_name = 'data' AND data_type = 'json'
+    ) THEN
+        ALTER TABLE telemetry ALTER COLUMN data TYPE JSONB USING data::jsonb;
+    END IF;
+END $$;
+""")
+register_schema_upgrade(
+    DatabaseType.END_DEVICE,
+    "CREATE INDEX IF NOT EXISTS ix_telemetry_data_gin ON telemetry USING gin (data jsonb_path_ops)"
+)
@@ -1,35 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Request, WebSocket, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional, Dict, Any
 from datetime import datetime
+from core.config import settings
 from core.database import get_db_end_device
-from core.logging import setup_logging
+from core.bulk import (
+    BulkDelete, BulkLookup, BulkResult, LookupResult, allocate_ids, bulk_delete, bulk_insert, bulk_update,
+    check_batch_size, created_result, deleted_result, lookup_many, lookup_one, parse_ids, updated_result,
+    yearly_prefix,
+)
+from core.conditional import conditional_item, conditional_list
+from core.projection import Projection
+from core.search import apply_search
+from core.liveness import FleetStatus, end_device_liveness
+from core.deadlines import reraise_deadline_errors
 from modules.end_device.models.end_device import End_device
-from modules.end_device.schemas.end_device import EndDeviceCreate, EndDevice as EndDeviceSchema, EndDeviceUpdate
+from modules.end_device.schemas.end_device import EndDeviceCreate, EndDevice as EndDeviceSchema, EndDeviceUpdate, EndDeviceBulkUpdate
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 def generate_end_device_id(db: Session):
     """Generate ED-YYYY-0001 format ID"""
-    year = datetime.now().year
-    prefix = f"ED-{year}-"
-    
-    # Find highest existing ID for this year
-    last_end_device = db.query(End_device).filter(End_device.end_device_ID.like(f"{prefix}%")).order_by(End_device.end_device_ID.desc()).first()
-    
-    if last_end_device:
-        try:
-            last_number = int(last_end_device.end_device_ID.split("-")[-1])
-            new_number = last_number + 1
-        except:
-            new_number = 1
-    else:
-        new_number = 1
-        
-    return f"{prefix}{new_number:04d}"
+    return allocate_ids(db, End_device.end_device_ID, yearly_prefix("ED"), 1)[0]
 
 @router.post("/", response_model=EndDeviceSchema, status_code=status.HTTP_201_CREATED)
 def create_end_device(end_device_data: EndDeviceCreate, db: Session = Depends(get_db_end_device)):
@@ -52,33 +49,136 @@ def create_end_device(end_device_data: EndDeviceCreate, db: Session = Depends(ge
         return new_end_device
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"End Device creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create End Device: {str(e)}"
         )
 
+# Bulk endpoints are registered before the /{id} routes so "bulk" is not read as an ID
+
+@router.post("/bulk", response_model=BulkResult[EndDeviceSchema], status_code=status.HTTP_201_CREATED)
+def create_end_devices_bulk(items: List[EndDeviceCreate], db: Session = Depends(get_db_end_device)):
+    """Create many end devices in one transaction; IDs are allocated in one step"""
+    check_batch_size(len(items))
+    try:
+        ids = allocate_ids(db, End_device.end_device_ID, yearly_prefix("ED"), len(items))
+        created = bulk_insert(db, End_device, [
+            {**item.model_dump(), "end_device_ID": new_id} for item, new_id in zip(items, ids)
+        ])
+        db.commit()
+        return created_result(created)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk end device creation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create end devices: {str(e)}"
+        )
+
+@router.patch("/bulk", response_model=BulkResult[EndDeviceSchema])
+def update_end_devices_bulk(items: List[EndDeviceBulkUpdate], db: Session = Depends(get_db_end_device)):
+    """Partially update many end devices by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(items))
+    try:
+        changes = [item.model_dump(exclude_unset=True) for item in items]
+        refreshed, _ = bulk_update(db, End_device, changes)
+        db.commit()
+        return updated_result(changes, refreshed)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk end device update error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update end devices: {str(e)}"
+        )
+
+@router.delete("/bulk", response_model=BulkResult[EndDeviceSchema])
+def delete_end_devices_bulk(request: BulkDelete, db: Session = Depends(get_db_end_device)):
+    """Delete many end devices by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(request.ids))
+    try:
+        deleted = bulk_delete(db, End_device, request.ids)
+        db.commit()
+        return deleted_result(request.ids, deleted)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk end device deletion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete end devices"
+        )
+
+@router.post("/lookup", response_model=LookupResult[EndDeviceSchema])
+def lookup_end_devices(request: BulkLookup, db: Session = Depends(get_db_end_device)):
+    """Fetch many end devices by internal or public ID in one query; unknown IDs are listed in `missing`"""
+    items, missing = lookup_many(db, End_device, End_device.end_device_ID, request.ids)
+    return {"items": items, "missing": missing}
+
+END_DEVICE_SEARCH_COLUMNS = (End_device.end_device_name, End_device.address)
+
+END_DEVICE_FIELDS = Projection(EndDeviceSchema, End_device, {
+    "summary": ["end_device_ID", "end_device_name"],
+})
+
 @router.get("/", response_model=List[EndDeviceSchema])
-def get_end_devices(skip: int = 0, limit: int = 10000, db: Session = Depends(get_db_end_device)):
-    """Get all end devices"""
-    end_devices = db.query(End_device).order_by(End_device.id.desc()).offset(skip).limit(limit).all()
+def get_end_devices(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10000,
+    ids: Optional[str] = Query(None, description="Comma-separated internal or public IDs (ED-YYYY-NNNN)"),
+    q: Optional[str] = Query(None, min_length=1, description="Search end device name or address; results ranked by match quality"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    view: Optional[str] = Query(None, description="Named fieldset: summary"),
+    db: Session = Depends(get_db_end_device)
+):
+    """Get all end devices; `ids` fetches a specific set in one query, `q` searches, `fields`/`view` trim the columns"""
+    fieldset = END_DEVICE_FIELDS.resolve(fields, view)
+    not_modified = conditional_list(request, response, db, End_device)
+    if not_modified is not None:
+        return not_modified
+    if ids:
+        items, _ = lookup_many(db, End_device, End_device.end_device_ID, parse_ids(ids))
+        return END_DEVICE_FIELDS.respond(items, fieldset, response.headers) if fieldset else items
+    query = db.query(End_device)
+    if q:
+        query = apply_search(query, End_device, END_DEVICE_SEARCH_COLUMNS, q)
+    else:
+        query = query.order_by(End_device.id.desc())
+    query = query.offset(skip).limit(limit)
+    if fieldset:
+        return END_DEVICE_FIELDS.respond(END_DEVICE_FIELDS.select(query, fieldset).all(), fieldset, response.headers)
+    end_devices = query.all()
     return end_devices
 
+@router.get("/status", response_model=FleetStatus)
+def get_end_devices_status(
+    status_filter: Optional[str] = Query(None, alias="status", description="online, offline or unknown"),
+    db: Session = Depends(get_db_end_device)
+):
+    """Online/offline state of every end device from recorded heartbeats (no telemetry query)"""
+    interval = settings.LIVENESS_DEFAULT_INTERVAL_SECONDS
+    fleet = end_device_liveness.status(
+        (end_device_ID, interval) for (end_device_ID,) in db.query(End_device.end_device_ID).order_by(End_device.id)
+    )
+    if status_filter:
+        fleet.items = [item for item in fleet.items if item.status == status_filter]
+    return fleet
+
 @router.get("/{identifier}", response_model=EndDeviceSchema)
-def get_end_device(identifier: str, db: Session = Depends(get_db_end_device)):
+def get_end_device(identifier: str, request: Request, response: Response, db: Session = Depends(get_db_end_device)):
     """Get a specific end device by internal ID (int) or Public ID (ED-XXXX-XXXX)"""
-    
-    # Try integer lookup first if it looks like an int
-    if identifier.isdigit():
-         end_device = db.query(End_device).filter(End_device.id == int(identifier)).first()
-         if end_device:
-             return end_device
-             
-    # Try string lookup
-    end_device = db.query(End_device).filter(End_device.end_device_ID == identifier).first()
-    
+    end_device = lookup_one(db, End_device, End_device.end_device_ID, identifier)
     if not end_device:
         raise HTTPException(status_code=404, detail="End device not found")
+    not_modified = conditional_item(request, response, end_device)
+    if not_modified is not None:
+        return not_modified
     return end_device
 
 @router.put("/{id}", response_model=EndDeviceSchema)
@@ -98,6 +198,7 @@ def update_end_device(id: int, end_device_data: EndDeviceUpdate, db: Session = D
         return end_device
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"End device update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -117,6 +218,7 @@ def delete_end_device(id: int, db: Session = Depends(get_db_end_device)):
         return None
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"End device deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -128,20 +230,35 @@ def delete_end_device(id: int, db: Session = Depends(get_db_end_device)):
 # Telemetry Endpoints
 # ============================================================================
 
-from modules.end_device.models.telemetry import Telemetry
-from modules.end_device.schemas.telemetry import TelemetryCreate, TelemetryResponse
+from modules.end_device.models.telemetry import Telemetry, TelemetryMetric
+from modules.end_device.schemas.telemetry import TelemetryCreate, TelemetryResponse, TelemetryMetricSummary
 from core.device_security import verify_device_token
+from core.telemetry_schema import extract_hot_metrics
+from core.telemetry_filter import parse_where, containment_clause
+from core.pubsub import telemetry_broker, sse_stream, websocket_stream
+from core.payloads import telemetry_payload, telemetry_request_body
+from core.telemetry_archive import read_archive
+from core.metrics import TELEMETRY_INGESTED
 
-@router.post("/{end_device_id}/telemetry", response_model=TelemetryResponse, status_code=status.HTTP_201_CREATED)
+# High-volume; sampled via LOG_SAMPLING["telemetry.ingest"]
+ingest_logger = logging.getLogger("telemetry.ingest")
+
+@router.post(
+    "/{end_device_id}/telemetry",
+    response_model=TelemetryResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=telemetry_request_body(TelemetryCreate),
+)
 def create_device_telemetry(
-    end_device_id: str, 
-    telemetry_data: TelemetryCreate, 
-    db: Session = Depends(get_db_end_device),
-    authorized: bool = Depends(verify_device_token)
+    end_device_id: str,
+    authorized: bool = Depends(verify_device_token),
+    telemetry_data: Dict[str, Any] = Depends(telemetry_payload),
+    db: Session = Depends(get_db_end_device)
 ):
     """
     Record new telemetry data for a device.
     Protected by X-IOT-Token header.
+    Accepts application/json, application/msgpack or application/cbor bodies.
     """
     # Verify device exists (using string ID mostly likely passed from device)
     device = db.query(End_device).filter(End_device.end_device_ID == end_device_id).first()
@@ -151,23 +268,119 @@ def create_device_telemetry(
     try:
         new_telemetry = Telemetry(
             end_device_id=end_device_id,
-            data=telemetry_data.data
+            data=telemetry_data
         )
+        # Promote registered hot keys into typed metric rows (same transaction)
+        hot_metrics = extract_hot_metrics(telemetry_data)
+        for key, value in hot_metrics.items():
+            new_telemetry.metrics.append(
+                TelemetryMetric(end_device_id=end_device_id, key=key, value=value)
+            )
         db.add(new_telemetry)
         db.commit()
         db.refresh(new_telemetry)
-        
+        TELEMETRY_INGESTED.labels("end_device").inc()
+        end_device_liveness.seen(end_device_id, settings.LIVENESS_DEFAULT_INTERVAL_SECONDS)
+        ingest_logger.info("Stored end_device telemetry %s for %s (%d metrics)", new_telemetry.id, end_device_id, len(hot_metrics))
+
+        telemetry_broker.publish(f"end_device:{end_device_id}", TelemetryResponse.model_validate(new_telemetry))
         return new_telemetry
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Telemetry creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{end_device_id}/telemetry", response_model=List[TelemetryResponse])
-def get_device_telemetry(end_device_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db_end_device)):
+def get_device_telemetry(
+    end_device_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    where: Optional[str] = None,
+    db: Session = Depends(get_db_end_device)
+):
     """
     Get JSON telemetry data for a specific device.
+    Optional `where` filter (`status:alarm` or a JSON object) is matched with JSONB containment.
+    Readings older than the retention window are served from the telemetry archive.
     """
-    return db.query(Telemetry).filter(Telemetry.end_device_id == end_device_id)\
-        .order_by(Telemetry.timestamp.desc())\
+    query = db.query(Telemetry).filter(Telemetry.end_device_id == end_device_id)
+
+    document = parse_where(where)
+    if document:
+        query = query.filter(containment_clause(Telemetry.data, document, db.bind.dialect.name))
+
+    rows = query.order_by(Telemetry.timestamp.desc())\
         .offset(skip).limit(limit).all()
+
+    # Page past the hot table into archived segment files (see scripts/archive_telemetry.py)
+    if len(rows) < limit:
+        hot_total = skip + len(rows) if rows else query.count()
+        rows += read_archive("end_device", end_device_id, max(0, skip - hot_total), limit - len(rows), document)
+    return rows
+
+@router.get("/{end_device_id}/telemetry/metrics/{key}", response_model=TelemetryMetricSummary)
+def get_device_metric_summary(
+    end_device_id: str,
+    key: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db_end_device)
+):
+    """
+    Aggregate a hot telemetry key (count/min/max/avg) over an optional time window.
+    Runs on the typed telemetry_metric table instead of parsing JSON per row.
+    """
+    query = db.query(
+        func.count(TelemetryMetric.id),
+        func.min(TelemetryMetric.value),
+        func.max(TelemetryMetric.value),
+        func.avg(TelemetryMetric.value),
+        func.min(TelemetryMetric.timestamp),
+        func.max(TelemetryMetric.timestamp),
+    ).filter(TelemetryMetric.end_device_id == end_device_id, TelemetryMetric.key == key)
+
+    if start:
+        query = query.filter(TelemetryMetric.timestamp >= start)
+    if end:
+        query = query.filter(TelemetryMetric.timestamp < end)
+
+    count, min_value, max_value, avg_value, first_ts, last_ts = query.one()
+    return TelemetryMetricSummary(
+        end_device_id=end_device_id,
+        key=key,
+        count=count,
+        min=min_value,
+        max=max_value,
+        avg=avg_value,
+        first_timestamp=first_ts,
+        last_timestamp=last_ts,
+    )
+
+# ============================================================================
+# Live Telemetry Streams
+# ============================================================================
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/telemetry/stream")
+async def stream_end_devices_telemetry(request: Request, ids: str):
+    """
+    Server-Sent Events stream of new readings for several devices (`?ids=a,b,c`).
+    """
+    channels = [f"end_device:{i.strip()}" for i in ids.split(",") if i.strip()]
+    return StreamingResponse(sse_stream(request, channels), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.websocket("/telemetry/ws")
+async def end_device_telemetry_websocket(websocket: WebSocket):
+    """
+    WebSocket stream; send {"subscribe": [ids]} / {"unsubscribe": [ids]} to manage devices.
+    """
+    await websocket_stream(websocket, "end_device")
+
+@router.get("/{end_device_id}/telemetry/stream")
+async def stream_device_telemetry(request: Request, end_device_id: str):
+    """
+    Server-Sent Events stream of new readings for one device (replaces polling).
+    """
+    return StreamingResponse(sse_stream(request, [f"end_device:{end_device_id}"]), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -17,6 +17,9 @@ class EndDeviceUpdate(BaseModel):
     fota_update_version: Optional[str] = None
     address: Optional[str] = None
 
+class EndDeviceBulkUpdate(EndDeviceUpdate):
+    id: int  # Internal ID of the end device to update
+
 class EndDevice(EndDeviceBase):
     id: int
     end_device_ID: str # Included in response
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 class TelemetryCreate(BaseModel):
@@ -13,3 +13,13 @@ class TelemetryResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class TelemetryMetricSummary(BaseModel):
+    end_device_id: str
+    key: str
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
-from core.database import BaseGateway as Base
+from core.database import BaseGateway as Base, DatabaseType
+from core.search import register_trigram_indexes
 
 class Gateway(Base):
     __tablename__ = "gateway"
@@ -21,6 +22,9 @@ class Gateway(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+# Trigram indexes behind the `q=` list search
+register_trigram_indexes(DatabaseType.GATEWAY, "gateway", ["gateway_name", "application_tags"])
+
 # ============================================================================
 # Application creation
 # ============================================================================
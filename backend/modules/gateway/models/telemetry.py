@@ -1,11 +1,53 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from core.database import BaseGateway as Base
+from core.database import BaseGateway as Base, DatabaseType, register_schema_upgrade
 
 class GatewayTelemetry(Base):
     __tablename__ = "gateway_telemetry"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     gateway_id = Column(String, index=True) # Matches Gateway.gateway_ID
-    data = Column(JSON, nullable=False)
+    data = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    metrics = relationship("GatewayTelemetryMetric", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # jsonb_path_ops GIN index answers data @> '{...}' containment filters
+        Index("ix_gateway_telemetry_data_gin", "data", postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"}),
+    )
+
+class GatewayTelemetryMetric(Base):
+    """Hot telemetry keys extracted into typed columns (see core.telemetry_schema)"""
+    __tablename__ = "gateway_telemetry_metric"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    telemetry_id = Column(Integer, ForeignKey("gateway_telemetry.id", ondelete="CASCADE"), nullable=False, index=True)
+    gateway_id = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    value = Column(Float, nullable=False)
+    # now() is the transaction timestamp, so this matches the parent GatewayTelemetry row
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_gateway_telemetry_metric_gateway_key_ts", "gateway_id", "key", "timestamp"),
+    )
+
+# Existing deployments created "gateway_telemetry.data" as JSON; convert it in place and add the GIN index
+register_schema_upgrade(DatabaseType.GATEWAY, """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'gateway_telemetry' AND column_name = 'data' AND data_type = 'json'
+    ) THEN
+        ALTER TABLE gateway_telemetry ALTER COLUMN data TYPE JSONB USING data::jsonb;
+    END IF;
+END $$;
+""")
+register_schema_upgrade(
+    DatabaseType.GATEWAY,
+    "CREATE INDEX IF NOT EXISTS ix_gateway_telemetry_data_gin ON gateway_telemetry USING gin (data jsonb_path_ops)"
+)
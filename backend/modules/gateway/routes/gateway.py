@@ -1,35 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Request, WebSocket, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
-from datetime import datetime
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from core.config import settings
 from core.database import get_db_gateway
-from core.logging import setup_logging
+from core.bulk import (
+    BulkDelete, BulkLookup, BulkResult, LookupResult, allocate_ids, bulk_delete, bulk_insert, bulk_update,
+    check_batch_size, created_result, deleted_result, lookup_many, lookup_one, parse_ids, updated_result,
+    yearly_prefix,
+)
+from core.conditional import conditional_item, conditional_list
+from core.projection import Projection
+from core.search import apply_search
+from core.liveness import FleetStatus, gateway_liveness, parse_interval
+from core.deadlines import reraise_deadline_errors
 from modules.gateway.models.gateway import Gateway
-from modules.gateway.schemas.gateway import GatewayCreate, Gateway as GatewaySchema, GatewayUpdate
+from modules.gateway.schemas.gateway import GatewayCreate, Gateway as GatewaySchema, GatewayUpdate, GatewayBulkUpdate
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 def generate_gateway_id(db: Session):
     """Generate G-YYYY-0001 format ID"""
-    year = datetime.now().year
-    prefix = f"G-{year}-"
-    
-    # Find highest existing ID for this year
-    last_gatewawy = db.query(Gateway).filter(Gateway.gateway_ID.like(f"{prefix}%")).order_by(Gateway.gateway_ID.desc()).first()
-    
-    if last_gatewawy:
-        try:
-            last_number = int(last_gatewawy.gateway_ID.split("-")[-1])
-            new_number = last_number + 1
-        except:
-            new_number = 1
-    else:
-        new_number = 1
-        
-    return f"{prefix}{new_number:04d}"
+    return allocate_ids(db, Gateway.gateway_ID, yearly_prefix("G"), 1)[0]
 
 @router.post("/", response_model=GatewaySchema, status_code=status.HTTP_201_CREATED)
 def create_gateway(gateway_data: GatewayCreate, db: Session = Depends(get_db_gateway)):
@@ -56,33 +55,136 @@ def create_gateway(gateway_data: GatewayCreate, db: Session = Depends(get_db_gat
         return new_gateway
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Gateway creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create Gateway: {str(e)}"
         )
 
+# Bulk endpoints are registered before the /{id} routes so "bulk" is not read as an ID
+
+@router.post("/bulk", response_model=BulkResult[GatewaySchema], status_code=status.HTTP_201_CREATED)
+def create_gateways_bulk(items: List[GatewayCreate], db: Session = Depends(get_db_gateway)):
+    """Create many gateways in one transaction; IDs are allocated in one step"""
+    check_batch_size(len(items))
+    try:
+        ids = allocate_ids(db, Gateway.gateway_ID, yearly_prefix("G"), len(items))
+        created = bulk_insert(db, Gateway, [
+            {**item.model_dump(), "gateway_ID": new_id} for item, new_id in zip(items, ids)
+        ])
+        db.commit()
+        return created_result(created)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk gateway creation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create gateways: {str(e)}"
+        )
+
+@router.patch("/bulk", response_model=BulkResult[GatewaySchema])
+def update_gateways_bulk(items: List[GatewayBulkUpdate], db: Session = Depends(get_db_gateway)):
+    """Partially update many gateways by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(items))
+    try:
+        changes = [item.model_dump(exclude_unset=True) for item in items]
+        refreshed, _ = bulk_update(db, Gateway, changes)
+        db.commit()
+        return updated_result(changes, refreshed)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk gateway update error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update gateways: {str(e)}"
+        )
+
+@router.delete("/bulk", response_model=BulkResult[GatewaySchema])
+def delete_gateways_bulk(request: BulkDelete, db: Session = Depends(get_db_gateway)):
+    """Delete many gateways by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(request.ids))
+    try:
+        deleted = bulk_delete(db, Gateway, request.ids)
+        db.commit()
+        return deleted_result(request.ids, deleted)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk gateway deletion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete gateways"
+        )
+
+@router.post("/lookup", response_model=LookupResult[GatewaySchema])
+def lookup_gateways(request: BulkLookup, db: Session = Depends(get_db_gateway)):
+    """Fetch many gateways by internal or public ID in one query; unknown IDs are listed in `missing`"""
+    items, missing = lookup_many(db, Gateway, Gateway.gateway_ID, request.ids)
+    return {"items": items, "missing": missing}
+
+GATEWAY_SEARCH_COLUMNS = (Gateway.gateway_name, Gateway.application_tags)
+
+GATEWAY_FIELDS = Projection(GatewaySchema, Gateway, {
+    "summary": ["gateway_ID", "gateway_name", "application_name"],
+})
+
 @router.get("/", response_model=List[GatewaySchema])
-def get_gateway(skip: int = 0, limit: int = 10000, db: Session = Depends(get_db_gateway)):
-    """Get all Gateway"""
-    gateway = db.query(Gateway).order_by(Gateway.id.desc()).offset(skip).limit(limit).all()
+def get_gateway(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10000,
+    ids: Optional[str] = Query(None, description="Comma-separated internal or public IDs (G-YYYY-NNNN)"),
+    q: Optional[str] = Query(None, min_length=1, description="Search gateway name or application tags; results ranked by match quality"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    view: Optional[str] = Query(None, description="Named fieldset: summary"),
+    db: Session = Depends(get_db_gateway)
+):
+    """Get all Gateway; `ids` fetches a specific set in one query, `q` searches, `fields`/`view` trim the columns"""
+    fieldset = GATEWAY_FIELDS.resolve(fields, view)
+    not_modified = conditional_list(request, response, db, Gateway)
+    if not_modified is not None:
+        return not_modified
+    if ids:
+        items, _ = lookup_many(db, Gateway, Gateway.gateway_ID, parse_ids(ids))
+        return GATEWAY_FIELDS.respond(items, fieldset, response.headers) if fieldset else items
+    query = db.query(Gateway)
+    if q:
+        query = apply_search(query, Gateway, GATEWAY_SEARCH_COLUMNS, q)
+    else:
+        query = query.order_by(Gateway.id.desc())
+    query = query.offset(skip).limit(limit)
+    if fieldset:
+        return GATEWAY_FIELDS.respond(GATEWAY_FIELDS.select(query, fieldset).all(), fieldset, response.headers)
+    gateway = query.all()
     return gateway
 
+@router.get("/status", response_model=FleetStatus)
+def get_gateways_status(
+    status_filter: Optional[str] = Query(None, alias="status", description="online, offline or unknown"),
+    db: Session = Depends(get_db_gateway)
+):
+    """Online/offline state of every gateway from recorded heartbeats (no telemetry query)"""
+    fleet = gateway_liveness.status(
+        (gateway_ID, parse_interval(interval))
+        for gateway_ID, interval in db.query(Gateway.gateway_ID, Gateway.gateway_stats_interval).order_by(Gateway.id)
+    )
+    if status_filter:
+        fleet.items = [item for item in fleet.items if item.status == status_filter]
+    return fleet
+
 @router.get("/{identifier}", response_model=GatewaySchema)
-def get_gateway(identifier: str, db: Session = Depends(get_db_gateway)):
+def get_gateway(identifier: str, request: Request, response: Response, db: Session = Depends(get_db_gateway)):
     """Get a specific gateway by internal ID (int) or Public ID (G-XXXX-XXXX)"""
-    
-    # Try integer lookup first if it looks like an int
-    if identifier.isdigit():
-         gateway = db.query(Gateway).filter(Gateway.id == int(identifier)).first()
-         if gateway:
-             return gateway
-             
-    # Try string lookup
-    gateway = db.query(Gateway).filter(Gateway.gateway_ID == identifier).first()
-    
+    gateway = lookup_one(db, Gateway, Gateway.gateway_ID, identifier)
     if not gateway:
         raise HTTPException(status_code=404, detail="Gateway not found")
+    not_modified = conditional_item(request, response, gateway)
+    if not_modified is not None:
+        return not_modified
     return gateway
 
 @router.put("/{id}", response_model=GatewaySchema)
@@ -102,6 +204,7 @@ def update_gateway(id: int, gateway_data: GatewayUpdate, db: Session = Depends(g
         return gateway
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Gateway update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -121,6 +224,7 @@ def delete_gateway(id: int, db: Session = Depends(get_db_gateway)):
         return None
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Gateway deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,20 +236,38 @@ def delete_gateway(id: int, db: Session = Depends(get_db_gateway)):
 # Telemetry Endpoints
 # ============================================================================
 
-from modules.gateway.models.telemetry import GatewayTelemetry
-from modules.gateway.schemas.telemetry import GatewayTelemetryCreate, GatewayTelemetryResponse
+from modules.gateway.models.telemetry import GatewayTelemetry, GatewayTelemetryMetric
+from modules.gateway.schemas.telemetry import (
+    GatewayTelemetryCreate, GatewayTelemetryResponse, GatewayTelemetryMetricSummary,
+    GatewayTelemetryUploadResult, TelemetryUploadError,
+)
 from core.device_security import verify_device_token
+from core.telemetry_schema import extract_hot_metrics
+from core.telemetry_filter import parse_where, containment_clause
+from core.pubsub import telemetry_broker, sse_stream, websocket_stream
+from core.payloads import ndjson_lines, telemetry_payload, telemetry_request_body
+from core.telemetry_archive import read_archive
+from core.metrics import TELEMETRY_INGESTED
 
-@router.post("/{gateway_id}/telemetry", response_model=GatewayTelemetryResponse, status_code=status.HTTP_201_CREATED)
+# High-volume; sampled via LOG_SAMPLING["telemetry.ingest"]
+ingest_logger = logging.getLogger("telemetry.ingest")
+
+@router.post(
+    "/{gateway_id}/telemetry",
+    response_model=GatewayTelemetryResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=telemetry_request_body(GatewayTelemetryCreate),
+)
 def create_gateway_telemetry(
-    gateway_id: str, 
-    telemetry_data: GatewayTelemetryCreate, 
-    db: Session = Depends(get_db_gateway),
-    authorized: bool = Depends(verify_device_token)
+    gateway_id: str,
+    authorized: bool = Depends(verify_device_token),
+    telemetry_data: Dict[str, Any] = Depends(telemetry_payload),
+    db: Session = Depends(get_db_gateway)
 ):
     """
     Record new telemetry data for a gateway.
     Protected by X-IOT-Token header.
+    Accepts application/json, application/msgpack or application/cbor bodies.
     """
     # Verify gateway exists (using string ID)
     gateway = db.query(Gateway).filter(Gateway.gateway_ID == gateway_id).first()
@@ -155,26 +277,240 @@ def create_gateway_telemetry(
     try:
         new_telemetry = GatewayTelemetry(
             gateway_id=gateway_id,
-            data=telemetry_data.data
+            data=telemetry_data
         )
+        # Promote the application's hot keys into typed metric rows (same transaction)
+        hot_metrics = extract_hot_metrics(telemetry_data, gateway.application_name)
+        for key, value in hot_metrics.items():
+            new_telemetry.metrics.append(
+                GatewayTelemetryMetric(gateway_id=gateway_id, key=key, value=value)
+            )
         db.add(new_telemetry)
         db.commit()
         db.refresh(new_telemetry)
-        
+        TELEMETRY_INGESTED.labels("gateway").inc()
+        gateway_liveness.seen(gateway_id, parse_interval(gateway.gateway_stats_interval))
+        ingest_logger.info("Stored gateway telemetry %s for %s (%d metrics)", new_telemetry.id, gateway_id, len(hot_metrics))
+
+        telemetry_broker.publish(f"gateway:{gateway_id}", GatewayTelemetryResponse.model_validate(new_telemetry))
         return new_telemetry
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Gateway Telemetry creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_upload_line(line: bytes) -> GatewayTelemetry:
+    """One NDJSON line: {"data": {...}, "timestamp": ISO-8601 or epoch seconds (optional)}"""
+    document = orjson.loads(line)
+    if not isinstance(document, dict) or not isinstance(document.get("data"), dict):
+        raise ValueError("line must be an object with a 'data' map")
+    timestamp = document.get("timestamp")
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    elif isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        try:
+            timestamp = datetime.fromtimestamp(timestamp, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"'timestamp' {timestamp} is out of range for epoch seconds")
+    elif isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+    else:
+        raise ValueError("'timestamp' must be an ISO-8601 string or epoch seconds")
+    return GatewayTelemetry(data=document["data"], timestamp=timestamp)
+
+def _store_upload_batch(db: Session, gateway_id: str, application_name: str, rows: List[GatewayTelemetry]):
+    for row in rows:
+        row.gateway_id = gateway_id
+        # Metric rows keep the reading's own time, not the upload transaction's now()
+        for key, value in extract_hot_metrics(row.data, application_name).items():
+            row.metrics.append(
+                GatewayTelemetryMetric(gateway_id=gateway_id, key=key, value=value, timestamp=row.timestamp)
+            )
+    db.add_all(rows)
+    db.commit()
+    db.expunge_all()  # Keep the identity map from growing with the upload
+
+@router.post(
+    "/{gateway_id}/telemetry/upload",
+    response_model=GatewayTelemetryUploadResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {media_type: {"schema": {"type": "string", "format": "binary"}}
+                        for media_type in ("application/x-ndjson", "application/jsonl")},
+        }
+    },
+)
+async def upload_gateway_telemetry(
+    gateway_id: str,
+    request: Request,
+    authorized: bool = Depends(verify_device_token),
+    db: Session = Depends(get_db_gateway)
+):
+    """
+    Upload a backlog of buffered readings as NDJSON, one {"data": {...}, "timestamp": ...}
+    object per line (Content-Encoding: gzip supported). The body is read as it
+    streams in and stored every TELEMETRY_UPLOAD_BATCH_SIZE lines, so uploads of
+    any size use constant memory. Bad lines are skipped and reported by line number.
+    Live streams are not notified of backlog readings.
+    Protected by X-IOT-Token header.
+    """
+    gateway = await run_in_threadpool(
+        lambda: db.query(Gateway.application_name, Gateway.gateway_stats_interval)
+        .filter(Gateway.gateway_ID == gateway_id).first()
+    )
+    if not gateway:
+        raise HTTPException(status_code=404, detail=f"Gateway with ID {gateway_id} not found")
+    application_name, stats_interval = gateway
+
+    batch_size = settings.TELEMETRY_UPLOAD_BATCH_SIZE
+    result = GatewayTelemetryUploadResult(gateway_id=gateway_id, lines=0, stored=0, failed=0, batches=0, errors=[])
+    batch: List[GatewayTelemetry] = []
+    batch_first_line = 0
+
+    def fail(line_number: int, error: str):
+        result.failed += 1
+        if len(result.errors) < settings.TELEMETRY_UPLOAD_MAX_ERRORS:
+            result.errors.append(TelemetryUploadError(line=line_number, error=error))
+        else:
+            result.errors_truncated = True
+
+    async def flush():
+        try:
+            await run_in_threadpool(_store_upload_batch, db, gateway_id, application_name, batch)
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            reraise_deadline_errors(e)
+            logger.error(f"Gateway telemetry upload for {gateway_id} failed after {result.stored} readings: {e}")
+            # Earlier batches are committed: the gateway can resume from batch_first_line
+            raise HTTPException(
+                status_code=500,
+                detail=f"Stored {result.stored} readings; lines from {batch_first_line} on were not stored: {e}"
+            )
+        result.stored += len(batch)
+        result.batches += 1
+        TELEMETRY_INGESTED.labels("gateway").inc(len(batch))
+        ingest_logger.info("Gateway %s upload: batch %d stored, %d readings so far", gateway_id, result.batches, result.stored)
+        batch.clear()
+
+    async for line_number, line in ndjson_lines(request, settings.TELEMETRY_UPLOAD_MAX_LINE_BYTES):
+        result.lines += 1
+        if line is None:
+            fail(line_number, f"line exceeds {settings.TELEMETRY_UPLOAD_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            row = _parse_upload_line(line)
+        except (ValueError, OverflowError, OSError) as e:  # Bad JSON (orjson raises ValueError) or out-of-range epoch
+            fail(line_number, str(e))
+            continue
+        if not batch:
+            batch_first_line = line_number
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    if result.stored:
+        gateway_liveness.seen(gateway_id, parse_interval(stats_interval))
+    logger.info(f"Gateway {gateway_id} uploaded {result.stored} readings in {result.batches} batches ({result.failed} failed lines)")
+    return result
+
 @router.get("/{gateway_id}/telemetry", response_model=List[GatewayTelemetryResponse])
-def get_gateway_telemetry(gateway_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db_gateway)):
+def get_gateway_telemetry(
+    gateway_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    where: Optional[str] = None,
+    db: Session = Depends(get_db_gateway)
+):
     """
     Get JSON telemetry data for a specific gateway.
+    Optional `where` filter (`status:alarm` or a JSON object) is matched with JSONB containment.
+    Readings older than the retention window are served from the telemetry archive.
     """
     # TODO: Add user authentication here (Depends(get_current_user)) when ready.
     # Currently public for frontend consumption.
-    
-    return db.query(GatewayTelemetry).filter(GatewayTelemetry.gateway_id == gateway_id)\
-        .order_by(GatewayTelemetry.timestamp.desc())\
+    query = db.query(GatewayTelemetry).filter(GatewayTelemetry.gateway_id == gateway_id)
+
+    document = parse_where(where)
+    if document:
+        query = query.filter(containment_clause(GatewayTelemetry.data, document, db.bind.dialect.name))
+
+    rows = query.order_by(GatewayTelemetry.timestamp.desc())\
         .offset(skip).limit(limit).all()
+
+    # Page past the hot table into archived segment files (see scripts/archive_telemetry.py)
+    if len(rows) < limit:
+        hot_total = skip + len(rows) if rows else query.count()
+        rows += read_archive("gateway", gateway_id, max(0, skip - hot_total), limit - len(rows), document)
+    return rows
+
+@router.get("/{gateway_id}/telemetry/metrics/{key}", response_model=GatewayTelemetryMetricSummary)
+def get_gateway_metric_summary(
+    gateway_id: str,
+    key: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db_gateway)
+):
+    """
+    Aggregate a hot telemetry key (count/min/max/avg) over an optional time window.
+    Runs on the typed gateway_telemetry_metric table instead of parsing JSON per row.
+    """
+    query = db.query(
+        func.count(GatewayTelemetryMetric.id),
+        func.min(GatewayTelemetryMetric.value),
+        func.max(GatewayTelemetryMetric.value),
+        func.avg(GatewayTelemetryMetric.value),
+        func.min(GatewayTelemetryMetric.timestamp),
+        func.max(GatewayTelemetryMetric.timestamp),
+    ).filter(GatewayTelemetryMetric.gateway_id == gateway_id, GatewayTelemetryMetric.key == key)
+
+    if start:
+        query = query.filter(GatewayTelemetryMetric.timestamp >= start)
+    if end:
+        query = query.filter(GatewayTelemetryMetric.timestamp < end)
+
+    count, min_value, max_value, avg_value, first_ts, last_ts = query.one()
+    return GatewayTelemetryMetricSummary(
+        gateway_id=gateway_id,
+        key=key,
+        count=count,
+        min=min_value,
+        max=max_value,
+        avg=avg_value,
+        first_timestamp=first_ts,
+        last_timestamp=last_ts,
+    )
+
+# ============================================================================
+# Live Telemetry Streams
+# ============================================================================
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/telemetry/stream")
+async def stream_gateways_telemetry(request: Request, ids: str):
+    """
+    Server-Sent Events stream of new readings for several gateways (`?ids=a,b,c`).
+    """
+    channels = [f"gateway:{i.strip()}" for i in ids.split(",") if i.strip()]
+    return StreamingResponse(sse_stream(request, channels), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.websocket("/telemetry/ws")
+async def gateway_telemetry_websocket(websocket: WebSocket):
+    """
+    WebSocket stream; send {"subscribe": [ids]} / {"unsubscribe": [ids]} to manage gateways.
+    """
+    await websocket_stream(websocket, "gateway")
+
+@router.get("/{gateway_id}/telemetry/stream")
+async def stream_gateway_telemetry(request: Request, gateway_id: str):
+    """
+    Server-Sent Events stream of new readings for one gateway (replaces polling).
+    """
+    return StreamingResponse(sse_stream(request, [f"gateway:{gateway_id}"]), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -26,6 +26,8 @@ class GatewayUpdate(BaseModel):
     gateway_name: Optional[str] = None
     gateway_stats_interval: Optional[str] = None
 
+class GatewayBulkUpdate(GatewayUpdate):
+    id: int  # Internal ID of the gateway to update
 
 class Gateway(GatewayBase):
     id: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 class GatewayTelemetryCreate(BaseModel):
@@ -13,3 +13,26 @@ class GatewayTelemetryResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class GatewayTelemetryMetricSummary(BaseModel):
+    gateway_id: str
+    key: str
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+
+class TelemetryUploadError(BaseModel):
+    line: int
+    error: str
+
+class GatewayTelemetryUploadResult(BaseModel):
+    gateway_id: str
+    lines: int  # Non-blank lines read
+    stored: int
+    failed: int
+    batches: int
+    errors: List[TelemetryUploadError]
+    errors_truncated: bool = False  # More than TELEMETRY_UPLOAD_MAX_ERRORS lines failed
@@ -1,2 +1,4 @@
-"""Health module - Health check endpoints"""
+"""Health module - Health check, metrics and profiling endpoints"""
 from .routes.health import router as health_router
+from .routes.metrics import router as metrics_router
+from .routes.profiling import router as profiling_router
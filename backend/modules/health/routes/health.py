@@ -4,16 +4,46 @@ Monitors system health for production deployment - Multi-Database Architecture
 """
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from datetime import datetime
-from core.database import (
-    engines, DatabaseType,
-    SessionLocalUsers,
-    SessionLocalOrders, 
-)
+from core.config import settings
+from core.database import engines, DatabaseType
+from core.fanout import run_concurrently, AsyncTTLCache
 
 router = APIRouter()
 
+# Orchestrators probe every few seconds; share one round of checks between them
+probe_cache = AsyncTTLCache(ttl=settings.HEALTH_CHECK_CACHE_SECONDS)
+
+
+def pool_stats(db_type: DatabaseType) -> dict:
+    """Connection pool counters for one engine (no database round-trip)"""
+    pool = engines[db_type].pool
+    return {
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def _ping(db_type: DatabaseType):
+    def ping():
+        with engines[db_type].connect() as conn:
+            conn.execute(text("SELECT 1"))
+    return ping
+
+
+async def probe_databases() -> dict:
+    """SELECT 1 against every engine concurrently, off the event loop, cached for a short TTL"""
+    async def compute():
+        return await run_concurrently(
+            {db_type.value: _ping(db_type) for db_type in DatabaseType},
+            timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        )
+    return await probe_cache.get_or_compute("databases", compute)
+
 
 @router.get("/health")
 async def health_check():
@@ -21,66 +51,49 @@ async def health_check():
     Health check endpoint for monitoring all databases
     Returns 200 if all systems are healthy, 503 if any are unhealthy
     """
+    probes = await probe_databases()
+
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "databases": {}
     }
 
-    # Check all databases
-    db_sessions = {
+    for db_type in DatabaseType:
+        probe = probes[db_type.value]
+        if probe["ok"]:
+            entry = {"status": "connected", "latency_ms": probe["elapsed_ms"]}
+        else:
+            health_status["status"] = "unhealthy"
+            entry = {"status": "error", "error": probe["error"]}
+        entry.update(pool_stats(db_type))
+        health_status["databases"][db_type.value] = entry
 
-        "users": SessionLocalUsers,
-        "orders": SessionLocalOrders,
+    status_code = 200 if health_status["status"] == "healthy" else 503
+    return JSONResponse(status_code=status_code, content=health_status)
 
-    }
 
-    all_healthy = True
-
-    for db_name, session_class in db_sessions.items():
-        db = session_class()
-        try:
-            db.execute(text("SELECT 1"))
-            health_status["databases"][db_name] = {
-                "status": "connected",
-                "pool_size": engines[DatabaseType(db_name)].pool.size(),
-                "checked_in": engines[DatabaseType(db_name)].pool.checkedin(),
-                "checked_out": engines[DatabaseType(db_name)].pool.checkedout(),
-            }
-        except Exception as e:
-            all_healthy = False
-            health_status["databases"][db_name] = {
-                "status": "error",
-                "error": str(e)
-            }
-        finally:
-            db.close()
-
-    if not all_healthy:
-        health_status["status"] = "unhealthy"
-
-    return health_status
+@router.get("/health/pools")
+async def pool_status():
+    """
+    Connection pool stats for every engine, without querying any database
+    """
+    return {db_type.value: pool_stats(db_type) for db_type in DatabaseType}
 
 
 @router.get("/ready")
 async def readiness_check():
     """
-    Readiness check - returns 200 if ready to serve traffic
-    Checks only the primary databases (clients, samples, users, orders)
+    Readiness check - returns 200 if ready to serve traffic, 503 otherwise
+    Checks every database engine
     """
-    db_sessions = {
-        "users": SessionLocalUsers,
-        "orders": SessionLocalOrders,
-    }
+    probes = await probe_databases()
 
-    for db_name, session_class in db_sessions.items():
-        db = session_class()
-        try:
-            db.execute(text("SELECT 1"))
-        except Exception:
-            db.close()
-            return {"status": "not_ready", "failed_db": db_name}
-        finally:
-            db.close()
+    failed = [name for name, probe in probes.items() if not probe["ok"]]
+    if failed:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "failed_db": failed[0], "failed_dbs": failed}
+        )
 
     return {"status": "ready"}
@@ -0,0 +1,16 @@
+"""
+Prometheus Metrics Endpoint
+Scraped at /metrics (outside the API prefix, per Prometheus convention)
+"""
+
+from fastapi import APIRouter, Response
+from core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus exposition of request, database and telemetry ingest metrics"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,63 @@
+"""
+Profiling Endpoints
+Admin-only sampling profiler for the worker that serves the request
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from core.admin_security import verify_admin_token
+from core.config import settings
+from core.profiler import SamplingProfiler, get_profile, profile_for
+
+router = APIRouter(dependencies=[Depends(verify_admin_token)])
+
+
+def _render(profiler: SamplingProfiler, format: str, name: str):
+    if format == "speedscope":
+        return JSONResponse(
+            content=profiler.speedscope(name),
+            headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'}
+        )
+    return PlainTextResponse(profiler.collapsed())
+
+
+@router.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """
+    Sample every thread of this worker for `seconds` and return the stacks,
+    either collapsed (flamegraph.pl) or as speedscope JSON. With several
+    Gunicorn workers, this profiles whichever worker received the request.
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}"
+        )
+    profiler = await run_in_threadpool(profile_for, seconds, settings.PROFILER_INTERVAL_MS / 1000)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    return _render(profiler, format, f"worker profile ({seconds}s)")
+
+
+@router.get("/admin/profile/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """Fetch a per-request profile by the X-Profile-Id returned with the profiled response"""
+    entry = get_profile(profile_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile '{profile_id}' not found on this worker"
+        )
+    label, profiler = entry
+    return _render(profiler, format, label)
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
-from core.database import BaseOrders as Base
+from core.database import BaseOrders as Base, DatabaseType
+from core.search import register_trigram_indexes
 
 class OrderManagement(Base):
     __tablename__ = "order_management"
@@ -16,3 +17,6 @@ class OrderManagement(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Trigram indexes behind the `q=` list search
+register_trigram_indexes(DatabaseType.ORDERS, "order_management", ["order_name", "order_desc", "client_name"])
@@ -1,33 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
 from core.database import get_db_orders
-from core.logging import setup_logging
+from core.bulk import (
+    BulkDelete, BulkLookup, BulkResult, LookupResult, allocate_ids, bulk_delete, bulk_insert, bulk_update,
+    check_batch_size, created_result, deleted_result, lookup_many, parse_ids, updated_result,
+    yearly_prefix,
+)
+from core.conditional import conditional_item, conditional_list
+from core.projection import Projection
+from core.search import apply_search
+from core.deadlines import reraise_deadline_errors
 from modules.orders.models.order import OrderManagement
-from modules.orders.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from modules.orders.schemas.order import OrderCreate, OrderUpdate, OrderBulkUpdate, OrderResponse
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 def generate_order_id(db: Session):
     """Generate ORD-YYYY-0001 format ID"""
-    year = datetime.now().year
-    prefix = f"ORD-{year}-"
-    
-    last_order = db.query(OrderManagement).filter(OrderManagement.order_id.like(f"{prefix}%")).order_by(OrderManagement.order_id.desc()).first()
-    
-    if last_order:
-        try:
-            last_number = int(last_order.order_id.split("-")[-1])
-            new_number = last_number + 1
-        except:
-            new_number = 1
-    else:
-        new_number = 1
-        
-    return f"{prefix}{new_number:04d}"
+    return allocate_ids(db, OrderManagement.order_id, yearly_prefix("ORD"), 1)[0]
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_order(order_data: OrderCreate, db: Session = Depends(get_db_orders)):
@@ -51,34 +45,127 @@ def create_order(order_data: OrderCreate, db: Session = Depends(get_db_orders)):
         return new_order
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Order creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create order: {str(e)}"
         )
 
+# Bulk endpoints are registered before the /{id} routes so "bulk" is not read as an ID
+
+@router.post("/bulk", response_model=BulkResult[OrderResponse], status_code=status.HTTP_201_CREATED)
+def create_orders_bulk(items: List[OrderCreate], db: Session = Depends(get_db_orders)):
+    """Create many orders in one transaction; IDs are allocated in one step"""
+    check_batch_size(len(items))
+    try:
+        ids = allocate_ids(db, OrderManagement.order_id, yearly_prefix("ORD"), len(items))
+        created = bulk_insert(db, OrderManagement, [
+            {**item.model_dump(), "order_id": new_id} for item, new_id in zip(items, ids)
+        ])
+        db.commit()
+        return created_result(created)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk order creation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create orders: {str(e)}"
+        )
+
+@router.patch("/bulk", response_model=BulkResult[OrderResponse])
+def update_orders_bulk(items: List[OrderBulkUpdate], db: Session = Depends(get_db_orders)):
+    """Partially update many orders by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(items))
+    try:
+        changes = [item.model_dump(exclude_unset=True) for item in items]
+        refreshed, _ = bulk_update(db, OrderManagement, changes)
+        db.commit()
+        return updated_result(changes, refreshed)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk order update error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update orders: {str(e)}"
+        )
+
+@router.delete("/bulk", response_model=BulkResult[OrderResponse])
+def delete_orders_bulk(request: BulkDelete, db: Session = Depends(get_db_orders)):
+    """Delete many orders by internal ID; unknown IDs are reported as not_found"""
+    check_batch_size(len(request.ids))
+    try:
+        deleted = bulk_delete(db, OrderManagement, request.ids)
+        db.commit()
+        return deleted_result(request.ids, deleted)
+    except Exception as e:
+        db.rollback()
+        reraise_deadline_errors(e)
+        logger.error(f"Bulk order deletion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete orders"
+        )
+
+@router.post("/lookup", response_model=LookupResult[OrderResponse])
+def lookup_orders(request: BulkLookup, db: Session = Depends(get_db_orders)):
+    """Fetch many orders by internal or public ID in one query; unknown IDs are listed in `missing`"""
+    items, missing = lookup_many(db, OrderManagement, OrderManagement.order_id, request.ids)
+    return {"items": items, "missing": missing}
+
+ORDER_SEARCH_COLUMNS = (OrderManagement.order_name, OrderManagement.order_desc, OrderManagement.client_name)
+
+ORDER_FIELDS = Projection(OrderResponse, OrderManagement, {
+    "summary": ["order_id", "order_name", "client_name"],
+})
+
 @router.get("/", response_model=List[OrderResponse])
 def get_orders(
+    request: Request,
+    response: Response,
     client_name: str = None,
     skip: int = 0,
     limit: int = 10000,
+    ids: Optional[str] = Query(None, description="Comma-separated internal or public IDs (ORD-YYYY-NNNN)"),
+    q: Optional[str] = Query(None, min_length=1, description="Search order name, description or client name; results ranked by match quality"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    view: Optional[str] = Query(None, description="Named fieldset: summary"),
     db: Session = Depends(get_db_orders)
 ):
-    """Get all orders with optional filter by client_name"""
+    """Get all orders with optional filter by client_name; `ids` fetches a specific set in one query, `q` searches, `fields`/`view` trim the columns"""
+    fieldset = ORDER_FIELDS.resolve(fields, view)
+    not_modified = conditional_list(request, response, db, OrderManagement)
+    if not_modified is not None:
+        return not_modified
+    if ids:
+        items, _ = lookup_many(db, OrderManagement, OrderManagement.order_id, parse_ids(ids))
+        return ORDER_FIELDS.respond(items, fieldset, response.headers) if fieldset else items
     query = db.query(OrderManagement)
     
     if client_name:
         query = query.filter(OrderManagement.client_name == client_name)
     
-    orders = query.order_by(OrderManagement.id.desc()).offset(skip).limit(limit).all()
+    if q:
+        query = apply_search(query, OrderManagement, ORDER_SEARCH_COLUMNS, q)
+    else:
+        query = query.order_by(OrderManagement.id.desc())
+    query = query.offset(skip).limit(limit)
+    if fieldset:
+        return ORDER_FIELDS.respond(ORDER_FIELDS.select(query, fieldset).all(), fieldset, response.headers)
+    orders = query.all()
     return orders
 
 @router.get("/{id}", response_model=OrderResponse)
-def get_order(id: int, db: Session = Depends(get_db_orders)):
+def get_order(id: int, request: Request, response: Response, db: Session = Depends(get_db_orders)):
     """Get a specific order by internal ID"""
     order = db.query(OrderManagement).filter(OrderManagement.id == id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    not_modified = conditional_item(request, response, order)
+    if not_modified is not None:
+        return not_modified
     return order
 
 @router.put("/{id}", response_model=OrderResponse)
@@ -98,6 +185,7 @@ def update_order(id: int, order_data: OrderUpdate, db: Session = Depends(get_db_
         return order
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Order update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -117,6 +205,7 @@ def delete_order(id: int, db: Session = Depends(get_db_orders)):
         return None
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"Order deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
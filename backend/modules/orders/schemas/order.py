@@ -19,6 +19,9 @@ class OrderUpdate(BaseModel):
     phone: Optional[str] = None
     address: Optional[str] = None
 
+class OrderBulkUpdate(OrderUpdate):
+    id: int  # Internal ID of the order to update
+
 class OrderResponse(BaseModel):
     id: int
     order_id: str
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from core.config import settings
 from core.database import get_db_users
+from core.bulk import BulkLookup, LookupResult, lookup_many, parse_ids
+from core.conditional import conditional_item, conditional_list
+from core.projection import Projection
 from core import get_password_hash
-from core.logging import setup_logging
+from core.deadlines import reraise_deadline_errors
 from modules.users.models.user import User
 from modules.users.schemas.user import UserCreate, UserResponse, UserUpdate
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -48,6 +53,7 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db_users)):
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,19 +61,54 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db_users)):
         )
 
 
+@router.post("/lookup", response_model=LookupResult[UserResponse])
+def lookup_users(request: BulkLookup, db: Session = Depends(get_db_users)):
+    """Fetch many users by ID or username in one query; unknown ones are listed in `missing`"""
+    items, missing = lookup_many(db, User, User.username, request.ids)
+    return {"items": items, "missing": missing}
+
+
+USER_FIELDS = Projection(UserResponse, User, {
+    "summary": ["username", "full_name"],
+    "directory": ["username", "full_name", "email", "department", "designation"],
+})
+
+
 @router.get("/", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db_users)):
-    """Get all users"""
-    users = db.query(User).order_by(User.id.desc()).offset(skip).limit(limit).all()
+def get_users(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    ids: Optional[str] = Query(None, description="Comma-separated user IDs or usernames"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    view: Optional[str] = Query(None, description="Named fieldset: summary, directory"),
+    db: Session = Depends(get_db_users)
+):
+    """Get all users; `ids` fetches a specific set in one query, `fields`/`view` trim the columns"""
+    fieldset = USER_FIELDS.resolve(fields, view)
+    not_modified = conditional_list(request, response, db, User, max_age=settings.REFERENCE_DATA_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
+    if ids:
+        items, _ = lookup_many(db, User, User.username, parse_ids(ids))
+        return USER_FIELDS.respond(items, fieldset, response.headers) if fieldset else items
+    query = db.query(User).order_by(User.id.desc()).offset(skip).limit(limit)
+    if fieldset:
+        return USER_FIELDS.respond(USER_FIELDS.select(query, fieldset).all(), fieldset, response.headers)
+    users = query.all()
     return users
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db_users)):
+def get_user(user_id: int, request: Request, response: Response, db: Session = Depends(get_db_users)):
     """Get a specific user"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    not_modified = conditional_item(request, response, user, max_age=settings.REFERENCE_DATA_MAX_AGE)
+    if not_modified is not None:
+        return not_modified
     return user
 
 
@@ -100,6 +141,7 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -129,6 +171,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db_users)):
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from core.database import get_db_users_implementation
+from core.bulk import BulkLookup, LookupResult, lookup_many, parse_ids
 from core import get_password_hash
-from core.logging import setup_logging
+from core.deadlines import reraise_deadline_errors
 from modules.users_implementation.models.user_implementation import User
 from modules.users_implementation.schemas.user_implementation import UserCreate, UserResponse, UserUpdate
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -48,6 +50,7 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db_users_implem
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User creation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,9 +58,24 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db_users_implem
         )
 
 
+@router.post("/lookup", response_model=LookupResult[UserResponse])
+def lookup_users(request: BulkLookup, db: Session = Depends(get_db_users_implementation)):
+    """Fetch many users by ID or username in one query; unknown ones are listed in `missing`"""
+    items, missing = lookup_many(db, User, User.username, request.ids)
+    return {"items": items, "missing": missing}
+
+
 @router.get("/", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db_users_implementation)):
-    """Get all users"""
+def get_users(
+    skip: int = 0,
+    limit: int = 100,
+    ids: Optional[str] = Query(None, description="Comma-separated user IDs or usernames"),
+    db: Session = Depends(get_db_users_implementation)
+):
+    """Get all users; `ids` fetches a specific set in one query"""
+    if ids:
+        items, _ = lookup_many(db, User, User.username, parse_ids(ids))
+        return items
     users = db.query(User).order_by(User.id.desc()).offset(skip).limit(limit).all()
     return users
 
@@ -100,6 +118,7 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User update error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -129,6 +148,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db_users_implementation)
         raise
     except Exception as e:
         db.rollback()
+        reraise_deadline_errors(e)
         logger.error(f"User deletion error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,3 @@
+"""
+Maintenance and operations scripts for the IOT backend
+"""
@@ -0,0 +1,137 @@
+"""
+Telemetry Retention Job
+Moves telemetry older than its retention policy (TELEMETRY_RETENTION_DAYS) out
+of Postgres into compressed segment files, one per device per day, and compacts
+day files that accumulated many small blocks. Archived rows stay readable
+through the telemetry GET endpoints.
+
+Usage (from backend/, e.g. nightly from cron):
+    python -m scripts.archive_telemetry [--dry-run]
+"""
+import argparse
+import logging
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from core.database import SessionLocalEndDevice, SessionLocalGateway
+from core.telemetry_archive import append_block, archived_max_id, compact_day, device_dir, get_retention_days
+from modules.end_device.models.telemetry import Telemetry
+from modules.gateway.models.gateway import Gateway
+from modules.gateway.models.telemetry import GatewayTelemetry
+
+logger = logging.getLogger(__name__)
+
+
+def cutoff_for(days: int) -> datetime:
+    """Start of the UTC day `days` ago, so every archived day is archived whole"""
+    today = datetime.now(timezone.utc).date()
+    return datetime.combine(today - timedelta(days=days), time.min, tzinfo=timezone.utc)
+
+
+def _day_start(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime.combine(value.date(), time.min, tzinfo=timezone.utc)
+
+
+def archive_device(db: Session, model, device_column, device_field: str, kind: str,
+                   device_id: str, cutoff: datetime, dry_run: bool = False) -> int:
+    """Archive and delete one device's rows older than cutoff, a day at a time"""
+    if device_dir(kind, device_id) is None:
+        # Kept in the hot table rather than aborting the whole run
+        logger.warning(f"Skipping {kind} {device_id!r}: id is not usable as an archive path component")
+        return 0
+    archived = 0
+    scope = db.query(func.min(model.timestamp)).filter(device_column == device_id, model.timestamp < cutoff)
+    oldest = scope.scalar()
+
+    while oldest is not None:
+        start = _day_start(oldest)
+        end = start + timedelta(days=1)
+        rows = db.query(model).filter(
+            device_column == device_id, model.timestamp >= start, model.timestamp < end
+        ).order_by(model.id).all()
+
+        day = start.date()
+        # Rows at or below the archived max id were written by a run that died before deleting them
+        already = archived_max_id(kind, device_id, day)
+        records = [
+            {"id": row.id, device_field: device_id, "data": row.data, "timestamp": row.timestamp}
+            for row in rows if row.id > already
+        ]
+
+        if dry_run:
+            logger.info(f"[dry-run] {kind}/{device_id}/{day}: would archive {len(records)} rows")
+        else:
+            append_block(kind, device_id, day, records)
+            db.query(model).filter(model.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+            db.commit()
+            compact_day(kind, device_id, day)
+        archived += len(records)
+
+        oldest = scope.filter(model.timestamp >= end).scalar()
+    return archived
+
+
+def archive_end_devices(dry_run: bool = False) -> int:
+    days = get_retention_days()
+    if days <= 0:
+        return 0
+    cutoff = cutoff_for(days)
+    db = SessionLocalEndDevice()
+    try:
+        device_ids = [
+            row[0] for row in
+            db.query(Telemetry.end_device_id).filter(Telemetry.timestamp < cutoff).distinct()
+        ]
+        return sum(
+            archive_device(db, Telemetry, Telemetry.end_device_id, "end_device_id", "end_device",
+                           device_id, cutoff, dry_run)
+            for device_id in device_ids
+        )
+    finally:
+        db.close()
+
+
+def archive_gateways(dry_run: bool = False) -> int:
+    db = SessionLocalGateway()
+    try:
+        applications = dict(db.query(Gateway.gateway_ID, Gateway.application_name).all())
+        policies = [get_retention_days(app) for app in set(applications.values())] + [get_retention_days()]
+        active = [days for days in policies if days > 0]
+        if not active:
+            return 0
+
+        # Candidates under the shortest retention; each gateway is then held to its own policy
+        gateway_ids = [
+            row[0] for row in
+            db.query(GatewayTelemetry.gateway_id)
+            .filter(GatewayTelemetry.timestamp < cutoff_for(min(active))).distinct()
+        ]
+        archived = 0
+        for gateway_id in gateway_ids:
+            days = get_retention_days(applications.get(gateway_id))
+            if days <= 0:
+                continue
+            archived += archive_device(db, GatewayTelemetry, GatewayTelemetry.gateway_id, "gateway_id",
+                                       "gateway", gateway_id, cutoff_for(days), dry_run)
+        return archived
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be archived without changing anything")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    end_device_rows = archive_end_devices(args.dry_run)
+    gateway_rows = archive_gateways(args.dry_run)
+    logger.info(f"Archived {end_device_rows} end device and {gateway_rows} gateway telemetry rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""
+Synthetic Data Generator
+Populates all six databases with realistic volumes for index and pool tuning:
+users (both user databases), clients, orders referencing clients, tenants
+with their gateways, end devices, and months of telemetry at each device's
+reporting cadence. Hot telemetry keys are promoted into the metric tables
+with one set-based INSERT ... SELECT per key, as the ingest endpoints would.
+
+Output is deterministic for a given --seed, scale and UTC day, whatever
+--workers is: every device draws from its own seeded RNG. PostgreSQL
+targets are loaded with COPY, using parallel worker processes per database
+and per device slice. Other dialects (SQLite stand-ins) fall back to
+batched executemany inserts in a single process.
+
+Run against empty databases.
+
+Usage (from backend/):
+    python -m scripts.generate_data --scale medium --seed 42 --workers 8
+    python -m scripts.generate_data --scale large --end-devices 10000 --days 120
+"""
+import argparse
+import csv
+import io
+import logging
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import func, insert, literal, select, text
+
+from core import get_password_hash, init_db
+from core.database import DatabaseType, engines
+from core.telemetry_schema import get_hot_keys
+from modules.clients.models.client import Client
+from modules.end_device.models.end_device import End_device
+from modules.end_device.models.telemetry import Telemetry, TelemetryMetric
+from modules.gateway.models.gateway import Gateway
+from modules.gateway.models.telemetry import GatewayTelemetry, GatewayTelemetryMetric
+from modules.orders.models.order import OrderManagement
+from modules.users.models.user import User
+from modules.users_implementation.models.user_implementation import User as UserImplementation
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 20000
+GENERATED_PASSWORD = "password123"
+
+# Row counts per scale; any of them can be overridden on the command line
+PROFILES: Dict[str, Dict[str, int]] = {
+    "small": {
+        "users": 50, "clients": 500, "orders_per_client": 4, "tenants": 5, "gateways_per_tenant": 4,
+        "end_devices": 500, "days": 7, "device_interval": 900,
+    },
+    "medium": {
+        "users": 200, "clients": 5000, "orders_per_client": 8, "tenants": 20, "gateways_per_tenant": 10,
+        "end_devices": 2000, "days": 30, "device_interval": 900,
+    },
+    "large": {
+        "users": 1000, "clients": 20000, "orders_per_client": 10, "tenants": 50, "gateways_per_tenant": 10,
+        "end_devices": 5000, "days": 90, "device_interval": 900,
+    },
+}
+
+APPLICATIONS = ["default", "cold-chain", "smart-metering", "asset-tracking"]
+GATEWAY_STATS_INTERVALS = ["60", "300", "900"]  # seconds, as entered in the dashboard
+DEPARTMENTS = ["Sample", "IE", "Planning", "Merchandising", "Implementation"]
+
+
+def _year() -> int:
+    return datetime.now().year
+
+
+def end_device_ids(count: int) -> List[str]:
+    return [f"ED-{_year()}-{i:04d}" for i in range(1, count + 1)]
+
+
+def gateway_ids(count: int) -> List[str]:
+    return [f"G-{_year()}-{i:04d}" for i in range(1, count + 1)]
+
+
+def client_names(count: int) -> List[str]:
+    return [f"Client {i:05d}" for i in range(1, count + 1)]
+
+
+# ============================================================================
+# Payload shapes
+# ============================================================================
+
+def new_device_state(rng: random.Random) -> Dict[str, float]:
+    return {"base_temp": rng.uniform(20, 30), "battery": rng.uniform(40, 100), "rssi": rng.randint(-100, -60)}
+
+
+def device_reading(rng: random.Random, when: Optional[datetime] = None,
+                   state: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    End device reading: diurnal temperature, humidity moving against it,
+    battery draining (and occasionally replaced), RSSI random walk.
+    """
+    when = when or datetime.now(timezone.utc)
+    state = state if state is not None else new_device_state(rng)
+    hour = when.hour + when.minute / 60
+    diurnal = math.sin((hour - 9) / 24 * 2 * math.pi)  # peaks mid-afternoon
+
+    state["battery"] = max(5.0, state["battery"] - rng.uniform(0, 0.05))
+    if state["battery"] <= 5.0 and rng.random() < 0.05:
+        state["battery"] = 100.0
+    state["rssi"] = min(-40, max(-115, state["rssi"] + rng.randint(-2, 2)))
+
+    temperature = state["base_temp"] + 6 * diurnal + rng.gauss(0, 0.4)
+    reading = {
+        "temperature": round(temperature, 2),
+        "humidity": round(min(99.0, max(10.0, 60 - 15 * diurnal + rng.gauss(0, 2))), 2),
+        "voltage": round(3.0 + 1.2 * state["battery"] / 100, 3),
+        "current": round(abs(rng.gauss(0.12, 0.03)), 3),
+        "rssi": state["rssi"],
+        "battery": round(state["battery"], 1),
+        "status": "alarm" if temperature > 38 else ("warn" if state["battery"] < 15 else "ok"),
+    }
+    if rng.random() < 0.02:
+        reading["door_open"] = True
+    return reading
+
+
+def new_gateway_state(rng: random.Random) -> Dict[str, float]:
+    return {"uptime": rng.randint(0, 30 * 86400), "load": rng.uniform(5, 40), "rssi": rng.randint(-95, -55)}
+
+
+def gateway_stats(rng: random.Random, interval: int, state: Dict[str, float]) -> Dict[str, Any]:
+    """Gateway stats report: packet counters, host health and mean uplink RSSI"""
+    state["uptime"] += interval
+    if rng.random() < 0.001:
+        state["uptime"] = 0  # reboot
+    rx = max(0, int(rng.gauss(state["load"] * interval / 60, 3)))
+    state["rssi"] = min(-40, max(-115, state["rssi"] + rng.randint(-1, 1)))
+    return {
+        "rx_packets": rx,
+        "rx_ok": int(rx * rng.uniform(0.93, 1.0)),
+        "tx_packets": int(rx * rng.uniform(0.05, 0.2)),
+        "rssi": state["rssi"],
+        "temperature": round(rng.gauss(45, 4), 1),
+        "cpu": round(min(100.0, max(1.0, rng.gauss(state["load"], 5))), 1),
+        "memory": round(rng.uniform(30, 70), 1),
+        "uptime": state["uptime"],
+    }
+
+
+def _timeline(rng: random.Random, end: datetime, days: int, interval: int) -> Iterator[datetime]:
+    """Report times at `interval` with +-10% jitter and occasional offline stretches"""
+    when = end - timedelta(days=days) + timedelta(seconds=rng.uniform(0, interval))
+    while when < end:
+        if rng.random() < 0.0005:
+            when += timedelta(seconds=interval * rng.randint(10, 200))  # went offline
+            continue
+        yield when
+        when += timedelta(seconds=interval * rng.uniform(0.9, 1.1))
+
+
+# ============================================================================
+# Writers
+# ============================================================================
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_rows(db_type: DatabaseType, table, columns: List[str], rows: Iterable[Tuple]) -> int:
+    """COPY on PostgreSQL, batched executemany elsewhere; one transaction per call"""
+    engine = engines[db_type]
+    written = 0
+
+    if engine.dialect.name == "postgresql":
+        preparer = engine.dialect.identifier_preparer
+        statement = (
+            f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(c) for c in columns)}) "
+            f"FROM STDIN WITH (FORMAT csv)"
+        )
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([_csv_value(v) for v in row])
+                written += 1
+                if written % BATCH_SIZE == 0:
+                    buffer.seek(0)
+                    cursor.copy_expert(statement, buffer)
+                    buffer.seek(0)
+                    buffer.truncate()
+            if buffer.tell():
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+            connection.commit()
+        finally:
+            connection.close()
+        return written
+
+    with engine.begin() as conn:
+        batch = []
+        for row in rows:
+            batch.append(dict(zip(columns, row)))
+            if len(batch) >= BATCH_SIZE:
+                conn.execute(insert(table), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+            written += len(batch)
+    return written
+
+
+# ============================================================================
+# Tasks (run in worker processes; each returns (label, rows written))
+# ============================================================================
+
+def _users_task(db_type: DatabaseType, model, config: dict, seed: int) -> Tuple[str, int]:
+    rng = random.Random(f"{seed}:users:{db_type.value}")
+    hashed = get_password_hash(GENERATED_PASSWORD)  # bcrypt once, shared by every generated user
+
+    def rows():
+        for i in range(1, config["users"] + 1):
+            department = rng.choice(DEPARTMENTS)
+            yield (f"user{i:04d}@example.com", f"user{i:04d}", hashed, f"Generated User {i}",
+                   True, False, department, rng.choice(["Executive", "Manager", "Engineer"]),
+                   [department.lower()])
+
+    columns = ["email", "username", "hashed_password", "full_name", "is_active", "is_superuser",
+               "department", "designation", "department_access"]
+    return f"{db_type.value} users", write_rows(db_type, model.__table__, columns, rows())
+
+
+def _clients_task(config: dict, seed: int) -> Tuple[str, int]:
+    rng = random.Random(f"{seed}:clients")
+    year = _year()
+
+    def rows():
+        for i, name in enumerate(client_names(config["clients"]), start=1):
+            yield (name, f"CLI-{year}-{i:04d}", f"client{i:05d}@example.com",
+                   f"+880{rng.randint(1000000000, 1999999999)}", f"{rng.randint(1, 300)} Industrial Road")
+
+    columns = ["client_name", "client_ID", "email", "phone", "address"]
+    return "clients", write_rows(DatabaseType.CLIENTS, Client.__table__, columns, rows())
+
+
+def _orders_task(config: dict, seed: int) -> Tuple[str, int]:
+    rng = random.Random(f"{seed}:orders")
+    year = _year()
+
+    def rows():
+        number = 0
+        for i, name in enumerate(client_names(config["clients"]), start=1):
+            # Skewed: a few clients place most orders
+            for _ in range(int(rng.expovariate(1 / config["orders_per_client"]))):
+                number += 1
+                yield (f"ORD-{year}-{number:04d}", f"Order {number}", f"Generated order for {name}",
+                       name, f"client{i:05d}@example.com")
+
+    columns = ["order_id", "order_name", "order_desc", "client_name", "email"]
+    return "orders", write_rows(DatabaseType.ORDERS, OrderManagement.__table__, columns, rows())
+
+
+def _gateway_plan(config: dict, seed: int) -> List[Dict[str, str]]:
+    """Deterministic gateway inventory, shared by the entity and telemetry tasks"""
+    rng = random.Random(f"{seed}:gateways")
+    ids = iter(gateway_ids(config["tenants"] * config["gateways_per_tenant"]))
+    plan = []
+    for t in range(1, config["tenants"] + 1):
+        application = rng.choice(APPLICATIONS)
+        for g in range(config["gateways_per_tenant"]):
+            plan.append({
+                "tenant_name": f"tenant-{t:03d}", "application_name": application,
+                "gateway_name": f"tenant-{t:03d}-gw-{g + 1:02d}", "gateway_ID": next(ids),
+                "gateway_stats_interval": rng.choice(GATEWAY_STATS_INTERVALS),
+            })
+    return plan
+
+
+def _gateways_task(config: dict, seed: int) -> Tuple[str, int]:
+    columns = ["tenant_name", "application_name", "application_description", "application_tags",
+               "gateway_name", "gateway_ID", "gateway_stats_interval"]
+    rows = (
+        (g["tenant_name"], g["application_name"], f"{g['application_name']} for {g['tenant_name']}",
+         g["application_name"], g["gateway_name"], g["gateway_ID"], g["gateway_stats_interval"])
+        for g in _gateway_plan(config, seed)
+    )
+    return "gateways", write_rows(DatabaseType.GATEWAY, Gateway.__table__, columns, rows)
+
+
+def _end_devices_task(config: dict, seed: int) -> Tuple[str, int]:
+    rng = random.Random(f"{seed}:end_devices")
+    columns = ["end_device_name", "end_device_ID", "maximum_bus", "fota_update_version", "address"]
+    rows = (
+        (f"Sensor {i:05d}", device_id, rng.randint(1, 8), rng.choice(["1.2.0", "1.2.1", "1.3.0"]),
+         f"Line {rng.randint(1, 40)}, Floor {rng.randint(1, 6)}")
+        for i, device_id in enumerate(end_device_ids(config["end_devices"]), start=1)
+    )
+    return "end devices", write_rows(DatabaseType.END_DEVICE, End_device.__table__, columns, rows)
+
+
+def _end_device_telemetry_task(config: dict, seed: int, start: int, stop: int, end: datetime) -> Tuple[str, int]:
+    def rows():
+        for device_id in end_device_ids(config["end_devices"])[start:stop]:
+            rng = random.Random(f"{seed}:telemetry:{device_id}")
+            state = new_device_state(rng)
+            for when in _timeline(rng, end, config["days"], config["device_interval"]):
+                yield device_id, device_reading(rng, when, state), when
+
+    columns = ["end_device_id", "data", "timestamp"]
+    return "end device telemetry", write_rows(DatabaseType.END_DEVICE, Telemetry.__table__, columns, rows())
+
+
+def _gateway_telemetry_task(config: dict, seed: int, start: int, stop: int, end: datetime) -> Tuple[str, int]:
+    def rows():
+        for gateway in _gateway_plan(config, seed)[start:stop]:
+            rng = random.Random(f"{seed}:telemetry:{gateway['gateway_ID']}")
+            interval = int(gateway["gateway_stats_interval"])
+            state = new_gateway_state(rng)
+            for when in _timeline(rng, end, config["days"], interval):
+                yield gateway["gateway_ID"], gateway_stats(rng, interval, state), when
+
+    columns = ["gateway_id", "data", "timestamp"]
+    return "gateway telemetry", write_rows(DatabaseType.GATEWAY, GatewayTelemetry.__table__, columns, rows())
+
+
+def _promote_task(kind: str, key: str, after_id: int) -> Tuple[str, int]:
+    """Copy one hot key of the newly loaded telemetry into its metric table, server side"""
+    if kind == "end_device":
+        value = Telemetry.data[key].as_float()
+        source = select(Telemetry.id, Telemetry.end_device_id, literal(key), value, Telemetry.timestamp).where(
+            Telemetry.id > after_id, value.isnot(None)
+        )
+        statement = insert(TelemetryMetric).from_select(
+            ["telemetry_id", "end_device_id", "key", "value", "timestamp"], source
+        )
+        db_type = DatabaseType.END_DEVICE
+    else:
+        applications = [app for app in APPLICATIONS if key in get_hot_keys(app)]
+        value = GatewayTelemetry.data[key].as_float()
+        source = (
+            select(GatewayTelemetry.id, GatewayTelemetry.gateway_id, literal(key), value, GatewayTelemetry.timestamp)
+            .join(Gateway, Gateway.gateway_ID == GatewayTelemetry.gateway_id)
+            .where(GatewayTelemetry.id > after_id, Gateway.application_name.in_(applications), value.isnot(None))
+        )
+        statement = insert(GatewayTelemetryMetric).from_select(
+            ["telemetry_id", "gateway_id", "key", "value", "timestamp"], source
+        )
+        db_type = DatabaseType.GATEWAY
+
+    with engines[db_type].begin() as conn:
+        rowcount = conn.execute(statement).rowcount
+    return f"{kind} metrics ({key})", rowcount
+
+
+def _run_task(task):
+    name, args = task
+    started = time.perf_counter()
+    label, rows = TASKS[name](*args)
+    return label, rows, time.perf_counter() - started
+
+
+TASKS = {
+    "users": _users_task,
+    "clients": _clients_task,
+    "orders": _orders_task,
+    "gateways": _gateways_task,
+    "end_devices": _end_devices_task,
+    "end_device_telemetry": _end_device_telemetry_task,
+    "gateway_telemetry": _gateway_telemetry_task,
+    "promote": _promote_task,
+}
+
+
+# ============================================================================
+# Orchestration
+# ============================================================================
+
+def _slices(count: int, parts: int) -> List[Tuple[int, int]]:
+    size = max(1, math.ceil(count / max(parts, 1)))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def _check_empty():
+    checks = [
+        (DatabaseType.END_DEVICE, End_device), (DatabaseType.GATEWAY, Gateway),
+        (DatabaseType.CLIENTS, Client), (DatabaseType.ORDERS, OrderManagement),
+    ]
+    for db_type, model in checks:
+        with engines[db_type].connect() as conn:
+            if conn.execute(select(func.count()).select_from(model.__table__)).scalar():
+                raise SystemExit(f"{model.__tablename__} already has rows; generate into empty databases")
+
+
+def _max_id(db_type: DatabaseType, model) -> int:
+    with engines[db_type].connect() as conn:
+        return conn.execute(select(func.max(model.id))).scalar() or 0
+
+
+def _run_phase(tasks: list, pool: Optional[ProcessPoolExecutor]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    results = pool.map(_run_task, tasks) if pool else map(_run_task, tasks)
+    for label, rows, seconds in results:
+        totals[label] = totals.get(label, 0) + rows
+        logger.info(f"{label}: {rows} rows in {seconds:.1f}s")
+    return totals
+
+
+def generate(config: Dict[str, int], seed: int, workers: int) -> Dict[str, int]:
+    init_db()
+    _check_empty()
+
+    if any(engine.dialect.name != "postgresql" for engine in engines.values()) and workers > 1:
+        logger.info("Non-PostgreSQL database configured; generating in a single process")
+        workers = 1
+
+    # Anchored to UTC midnight so a seed reproduces the same rows all day
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    gateway_count = config["tenants"] * config["gateways_per_tenant"]
+    after_end_device = _max_id(DatabaseType.END_DEVICE, Telemetry)
+    after_gateway = _max_id(DatabaseType.GATEWAY, GatewayTelemetry)
+
+    entity_tasks = [
+        ("users", (DatabaseType.USERS, User, config, seed)),
+        ("users", (DatabaseType.USERS_IMPLEMENTATION, UserImplementation, config, seed)),
+        ("clients", (config, seed)),
+        ("orders", (config, seed)),
+        ("gateways", (config, seed)),
+        ("end_devices", (config, seed)),
+    ]
+    telemetry_tasks = (
+        [("end_device_telemetry", (config, seed, a, b, end)) for a, b in _slices(config["end_devices"], workers)]
+        + [("gateway_telemetry", (config, seed, a, b, end)) for a, b in _slices(gateway_count, workers)]
+    )
+    gateway_keys = sorted({key for app in APPLICATIONS for key in get_hot_keys(app)})
+    promote_tasks = (
+        [("promote", ("end_device", key, after_end_device)) for key in get_hot_keys()]
+        + [("promote", ("gateway", key, after_gateway)) for key in gateway_keys]
+    )
+
+    totals: Dict[str, int] = {}
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    try:
+        for tasks in (entity_tasks, telemetry_tasks, promote_tasks):
+            for label, rows in _run_phase(tasks, pool).items():
+                totals[label] = totals.get(label, 0) + rows
+    finally:
+        if pool:
+            pool.shutdown()
+
+    for db_type, engine in engines.items():
+        if engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("ANALYZE"))
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Worker processes (PostgreSQL only)")
+    for key in PROFILES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help="Override the scale profile")
+    args = parser.parse_args()
+
+    config = dict(PROFILES[args.scale])
+    config.update({key: getattr(args, key) for key in config if getattr(args, key) is not None})
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    totals = generate(config, args.seed, args.workers)
+    logger.info(f"Generated {sum(totals.values())} rows in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
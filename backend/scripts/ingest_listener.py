@@ -0,0 +1,429 @@
+"""
+Telemetry Ingestion Listener
+Accepts device telemetry over MQTT and/or compact UDP datagrams and writes it
+to the telemetry tables in batches. Runs as its own process, so constrained
+devices skip the TCP + HTTP exchange per reading and the HTTP workers never
+see this traffic. Authentication is the same shared device token as the
+X-IOT-Token header, and stored rows are identical to HTTP ingest (hot
+metrics extracted, live streams and device liveness updated through Redis
+when REDIS_URL is set).
+
+MQTT: subscribe to {INGEST_MQTT_TOPIC_PREFIX}/end_device/{id} and
+{INGEST_MQTT_TOPIC_PREFIX}/gateway/{id}. The payload is the HTTP body plus
+the token, as JSON or MessagePack: {"token": "...", "data": {...}}.
+
+UDP datagram (one reading, no reply):
+    byte 0        format version, 1
+    byte 1        kind: "e" end device, "g" gateway
+    byte 2        token length T, then T bytes of token
+    next byte     device ID length N, then N bytes of device ID
+    remainder     the telemetry `data` map as MessagePack (or JSON)
+
+Usage (from backend/):
+    python -m scripts.ingest_listener [--udp-port 5684] [--mqtt-url mqtt://localhost:1883]
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import redis
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocalEndDevice, SessionLocalGateway
+from core.device_security import is_valid_device_token
+from core.liveness import TRACKERS, end_device_liveness, gateway_liveness, parse_interval
+from core.metrics import TELEMETRY_INGESTED
+from core.payloads import decode_body, extract_data, json_problem
+from core.pubsub import telemetry_broker
+from core.telemetry_schema import extract_hot_metrics
+from modules.end_device.models.end_device import End_device
+from modules.end_device.models.telemetry import Telemetry, TelemetryMetric
+from modules.end_device.schemas.telemetry import TelemetryResponse
+from modules.gateway.models.gateway import Gateway
+from modules.gateway.models.telemetry import GatewayTelemetry, GatewayTelemetryMetric
+from modules.gateway.schemas.telemetry import GatewayTelemetryResponse
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:  # Optional: only needed with --mqtt-url / INGEST_MQTT_URL
+    mqtt = None
+
+logger = logging.getLogger(__name__)
+
+UDP_VERSION = 1
+UDP_KINDS = {b"e"[0]: "end_device", b"g"[0]: "gateway"}
+UDP_RECEIVE_BUFFER = 4 * 1024 * 1024  # Absorbs bursts while a batch is being written; capped by net.core.rmem_max
+STATS_INTERVAL_SECONDS = 60
+
+
+class RejectedReading(Exception):
+    """A message that cannot be stored (bad format, bad token, unknown kind)"""
+
+
+@dataclass
+class Reading:
+    kind: str  # "end_device" | "gateway"
+    device_id: str
+    data: Dict[str, Any]
+    received_at: datetime
+
+
+def _sniff_content_type(body: bytes) -> str:
+    return "application/json" if body[:1] in (b"{", b"[") else "application/msgpack"
+
+
+def _decode(body: bytes) -> Any:
+    try:
+        return decode_body(body, _sniff_content_type(body))
+    except HTTPException as e:
+        raise RejectedReading(e.detail)
+
+
+def _check_token(token: Any):
+    if not isinstance(token, str) or not is_valid_device_token(token):
+        raise RejectedReading("invalid device token")
+
+
+def parse_datagram(datagram: bytes) -> Reading:
+    """Decode one compact UDP datagram (layout in the module docstring)"""
+    try:
+        if datagram[0] != UDP_VERSION:
+            raise RejectedReading(f"unsupported datagram version {datagram[0]}")
+        kind = UDP_KINDS.get(datagram[1])
+        if kind is None:
+            raise RejectedReading(f"unknown device kind {datagram[1:2]!r}")
+        offset = 3 + datagram[2]
+        token = datagram[3:offset].decode("ascii")
+        id_length = datagram[offset]
+        device_id = datagram[offset + 1:offset + 1 + id_length].decode("utf-8")
+        body = datagram[offset + 1 + id_length:]
+    except (IndexError, UnicodeDecodeError):
+        raise RejectedReading("truncated or malformed datagram")
+    if not device_id or not body:
+        raise RejectedReading("truncated or malformed datagram")
+    _check_token(token)
+    data = _decode(body)
+    if not isinstance(data, dict):
+        raise RejectedReading("telemetry data must be a map")
+    problem = json_problem(data)
+    if problem:
+        raise RejectedReading(f"telemetry values must be JSON types: {problem}")
+    return Reading(kind, device_id, data, datetime.now(timezone.utc))
+
+
+def parse_mqtt_message(topic: str, payload: bytes) -> Reading:
+    """Decode {prefix}/{kind}/{device_id} + {"token": ..., "data": {...}}"""
+    prefix = settings.INGEST_MQTT_TOPIC_PREFIX.rstrip("/") + "/"
+    kind, _, device_id = topic[len(prefix):].partition("/") if topic.startswith(prefix) else ("", "", "")
+    if kind not in ("end_device", "gateway") or not device_id or "/" in device_id:
+        raise RejectedReading(f"unexpected topic {topic}")
+    document = _decode(payload)
+    _check_token(document.get("token") if isinstance(document, dict) else None)
+    try:
+        data = extract_data(document)
+    except HTTPException as e:
+        raise RejectedReading(e.detail)
+    return Reading(kind, device_id, data, datetime.now(timezone.utc))
+
+
+# ============================================================================
+# Batched writes
+# ============================================================================
+
+def store_end_device_readings(db: Session, readings: List[Reading], track_liveness: bool = False) -> Tuple[int, int]:
+    """Insert a batch in one transaction; returns (stored, dropped for unknown device)"""
+    ids = {reading.device_id for reading in readings}
+    known = {row[0] for row in db.query(End_device.end_device_ID).filter(End_device.end_device_ID.in_(ids))}
+
+    rows = []
+    for reading in readings:
+        if reading.device_id not in known:
+            continue
+        row = Telemetry(end_device_id=reading.device_id, data=reading.data, timestamp=reading.received_at)
+        for key, value in extract_hot_metrics(reading.data).items():
+            row.metrics.append(TelemetryMetric(
+                end_device_id=reading.device_id, key=key, value=value, timestamp=reading.received_at
+            ))
+        rows.append(row)
+    if not rows:
+        return 0, len(readings)
+
+    db.add_all(rows)
+    db.flush()
+    published = [TelemetryResponse.model_validate(row) for row in rows]  # Before commit expires the rows
+    db.commit()
+    TELEMETRY_INGESTED.labels("end_device").inc(len(rows))
+
+    if track_liveness:
+        for device_id in {message.end_device_id for message in published}:
+            end_device_liveness.seen(device_id, settings.LIVENESS_DEFAULT_INTERVAL_SECONDS)
+    for message in published:
+        telemetry_broker.publish(f"end_device:{message.end_device_id}", message)
+    return len(rows), len(readings) - len(rows)
+
+
+def store_gateway_readings(db: Session, readings: List[Reading], track_liveness: bool = False) -> Tuple[int, int]:
+    """Insert a batch in one transaction; returns (stored, dropped for unknown gateway)"""
+    ids = {reading.device_id for reading in readings}
+    gateways = {
+        gateway_id: (application_name, stats_interval)
+        for gateway_id, application_name, stats_interval in db.query(
+            Gateway.gateway_ID, Gateway.application_name, Gateway.gateway_stats_interval
+        ).filter(Gateway.gateway_ID.in_(ids))
+    }
+
+    rows = []
+    for reading in readings:
+        if reading.device_id not in gateways:
+            continue
+        application_name = gateways[reading.device_id][0]
+        row = GatewayTelemetry(gateway_id=reading.device_id, data=reading.data, timestamp=reading.received_at)
+        for key, value in extract_hot_metrics(reading.data, application_name).items():
+            row.metrics.append(GatewayTelemetryMetric(
+                gateway_id=reading.device_id, key=key, value=value, timestamp=reading.received_at
+            ))
+        rows.append(row)
+    if not rows:
+        return 0, len(readings)
+
+    db.add_all(rows)
+    db.flush()
+    published = [GatewayTelemetryResponse.model_validate(row) for row in rows]
+    db.commit()
+    TELEMETRY_INGESTED.labels("gateway").inc(len(rows))
+
+    if track_liveness:
+        for gateway_id in {message.gateway_id for message in published}:
+            gateway_liveness.seen(gateway_id, parse_interval(gateways[gateway_id][1]))
+    for message in published:
+        telemetry_broker.publish(f"gateway:{message.gateway_id}", message)
+    return len(rows), len(readings) - len(rows)
+
+
+def _cause(exc: Exception) -> Exception:
+    """The driver error behind a SQLAlchemy exception, without the statement and every bound row"""
+    return getattr(exc, "orig", None) or exc
+
+
+STORES = {
+    "end_device": (SessionLocalEndDevice, store_end_device_readings),
+    "gateway": (SessionLocalGateway, store_gateway_readings),
+}
+
+
+class BatchWriter:
+    """
+    Bounded queue between the network listeners (event loop) and the database
+    (worker thread). A batch is written when it reaches INGEST_BATCH_SIZE or
+    its oldest reading has waited INGEST_FLUSH_MS, whichever comes first.
+    """
+
+    def __init__(self, track_liveness: bool = False):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        self.track_liveness = track_liveness
+        self._closing = False
+        self.stats = {"received": 0, "rejected": 0, "overflow": 0, "stored": 0, "unknown_device": 0, "failed": 0}
+
+    def offer(self, reading: Reading):
+        """Called on the event loop; drops the reading when the queue is full"""
+        self.stats["received"] += 1
+        try:
+            self.queue.put_nowait(reading)
+        except asyncio.QueueFull:
+            self.stats["overflow"] += 1
+
+    def reject(self, source: str, reason: str):
+        self.stats["rejected"] += 1
+        logger.debug(f"Rejected {source} telemetry: {reason}")
+
+    async def run(self):
+        """Write batches until close() is called and the queue is empty"""
+        while not (self._closing and self.queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await asyncio.to_thread(self._write, batch)
+
+    def close(self):
+        self._closing = True
+
+    async def _collect(self) -> List[Reading]:
+        flush_seconds = settings.INGEST_FLUSH_MS / 1000
+        batch: List[Reading] = []
+        deadline = None
+        while len(batch) < settings.INGEST_BATCH_SIZE:
+            # While idle, wake every flush interval so close() is noticed
+            timeout = flush_seconds if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + flush_seconds
+        return batch
+
+    def _write(self, batch: List[Reading]):
+        by_kind: Dict[str, List[Reading]] = {}
+        for reading in batch:
+            by_kind.setdefault(reading.kind, []).append(reading)
+
+        for kind, readings in by_kind.items():
+            try:
+                self._store(kind, readings)
+            except Exception as e:
+                if len(readings) == 1:
+                    self.stats["failed"] += 1
+                    logger.error(f"Storing {kind} reading from {readings[0].device_id} failed: {_cause(e)}")
+                    continue
+                # One bad row fails the whole INSERT; retry one by one so the rest of the batch survives
+                logger.warning(f"Storing {len(readings)} {kind} readings failed, retrying individually: {_cause(e)}")
+                for reading in readings:
+                    try:
+                        self._store(kind, [reading])
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        logger.error(f"Storing {kind} reading from {reading.device_id} failed: {_cause(e)}")
+
+    def _store(self, kind: str, readings: List[Reading]):
+        session_factory, store = STORES[kind]
+        db = session_factory()
+        try:
+            stored, unknown = store(db, readings, self.track_liveness)
+            self.stats["stored"] += stored
+            self.stats["unknown_device"] += unknown
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# ============================================================================
+# Listeners
+# ============================================================================
+
+class UDPTelemetryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, writer: BatchWriter):
+        self.writer = writer
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            self.writer.offer(parse_datagram(data))
+        except RejectedReading as e:
+            self.writer.reject(f"UDP {addr[0]}", str(e))
+
+
+def start_mqtt(url: str, writer: BatchWriter, loop: asyncio.AbstractEventLoop):
+    """Subscribe on paho's network thread; readings are handed to the event loop"""
+    if mqtt is None:
+        raise SystemExit("MQTT ingestion needs the paho-mqtt package (pip install paho-mqtt)")
+    parsed = urlparse(url)
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"erp-ingest-{time.time_ns()}")
+    if parsed.username:
+        client.username_pw_set(parsed.username, parsed.password)
+    if parsed.scheme == "mqtts":
+        client.tls_set()
+    topic = settings.INGEST_MQTT_TOPIC_PREFIX.rstrip("/") + "/+/+"
+
+    def on_connect(client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            logger.error(f"MQTT connection to {parsed.hostname} refused: {reason_code}")
+            return
+        client.subscribe(topic, qos=settings.INGEST_MQTT_QOS)  # Again after every reconnect
+        logger.info(f"Subscribed to {topic} on {parsed.hostname}")
+
+    def on_message(client, userdata, message):
+        try:
+            reading = parse_mqtt_message(message.topic, message.payload)
+        except RejectedReading as e:
+            loop.call_soon_threadsafe(writer.reject, f"MQTT {message.topic}", str(e))
+            return
+        loop.call_soon_threadsafe(writer.offer, reading)
+
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect_async(parsed.hostname, parsed.port or (8883 if parsed.scheme == "mqtts" else 1883))
+    client.loop_start()
+    return client
+
+
+def log_stats(writer: BatchWriter):
+    logger.info("Ingest listener: " + ", ".join(f"{name}={count}" for name, count in writer.stats.items())
+                + f", queued={writer.queue.qsize()}")
+
+
+async def report_stats(writer: BatchWriter):
+    while True:
+        await asyncio.sleep(STATS_INTERVAL_SECONDS)
+        log_stats(writer)
+
+
+async def serve(udp_port: int, mqtt_url: Optional[str]):
+    loop = asyncio.get_running_loop()
+    liveness_redis = redis.Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+    if liveness_redis is not None:
+        await telemetry_broker.start()
+        for tracker in TRACKERS:
+            tracker.use_redis(liveness_redis)
+    else:
+        logger.warning("REDIS_URL is not set: live streams and device liveness will not see listener ingests")
+
+    writer = BatchWriter(track_liveness=liveness_redis is not None)
+    writing = asyncio.create_task(writer.run())
+    reporting = asyncio.create_task(report_stats(writer))
+    transport = client = None
+    if udp_port:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: UDPTelemetryProtocol(writer), local_addr=(settings.INGEST_UDP_HOST, udp_port)
+        )
+        transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER)
+        logger.info(f"Listening for UDP telemetry on {settings.INGEST_UDP_HOST}:{udp_port}")
+    if mqtt_url:
+        client = start_mqtt(mqtt_url, writer, loop)
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Stopping ingest listener")
+    if transport is not None:
+        transport.close()
+    if client is not None:
+        client.loop_stop()
+        client.disconnect()
+    reporting.cancel()
+    writer.close()
+    await writing  # Flushes everything already received
+    log_stats(writer)
+    if liveness_redis is not None:
+        await telemetry_broker.stop()
+        for tracker in TRACKERS:
+            tracker.use_redis(None)
+        liveness_redis.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--udp-port", type=int, default=settings.INGEST_UDP_PORT, help="0 disables UDP")
+    parser.add_argument("--mqtt-url", default=settings.INGEST_MQTT_URL, help="e.g. mqtt://localhost:1883")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.udp_port and not args.mqtt_url:
+        parser.error("nothing to listen on: set --udp-port and/or --mqtt-url (or INGEST_UDP_PORT / INGEST_MQTT_URL)")
+    asyncio.run(serve(args.udp_port, args.mqtt_url))
+
+
+if __name__ == "__main__":
+    main()